@@ -1,7 +1,9 @@
 import pandas as pd
-import geopandas as gpd
-import matplotlib.pyplot as plt
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.country_areas import country_area_table
 
 # === CONFIG ===
 forecast_path = "../forecast/forecasting/output/forecast_2026_to_2050.csv"
@@ -15,7 +17,6 @@ os.makedirs(output_folder, exist_ok=True)
 forecast_df = pd.read_csv(forecast_path)
 density_df = pd.read_csv(density_path)
 bees_df = pd.read_csv(bee_path)
-world = gpd.read_file(shapefile_path)
 
 # === STRIP & RENAME 'Czech Republic' TO 'Czechia' (ANY CASE) ===
 for df in [forecast_df, density_df, bees_df]:
@@ -46,10 +47,8 @@ density_df.rename(columns={
 bees_df.rename(columns={"Honey_bee_colonies": "Bee_Count"}, inplace=True)
 
 # === PREPARE SHAPEFILE AREA ===
-world["Country"] = world["ADMIN"].str.strip()
-world = world.to_crs(epsg=3857)  # Web Mercator for area calc
-world["shapefile_area_km2"] = world["geometry"].area / 1e6
-area_lookup = world[["Country", "shapefile_area_km2"]]
+# Equal-area (EPSG:6933) areas shared with the hornet forecast
+area_lookup = country_area_table(shapefile_path, country_column="Country", area_column="shapefile_area_km2")
 
 # === PART 1: Combine Hornet Forecast and Density Data ===
 density_part = density_df[density_df["Year"] <= 2024][
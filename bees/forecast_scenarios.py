@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+File: forecast_scenarios.py
+Description: Forecasts bee colony decline until 2050 for all hornet scenarios in one pass
+             over shared inputs, scenario being an extra array dimension of the projection.
+             Writes one long-format table plus each scenario's table at the paths its
+             single-scenario scripts (forecast.py, Forecast_last.py) write.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.bee_projection import run_bee_scenarios
+
+# === PATHS ===
+bee_trend_path = "output/bee_density_trends.csv"
+correlation_path = "output/correlationByCountry.csv"
+predation_forecast_path = "../predator/output/forecast_with_predation_adjustment.csv"  # output of predator/load_forecast.py
+output_path = "output/bee_forecast_scenarios.csv"
+os.makedirs("output", exist_ok=True)
+
+# === SCENARIOS ===
+# Optional keys: default_correlation, decline_cap (see common/bee_projection.py)
+scenarios = [
+    {
+        "name": "pessimistic",
+        "hornet_path": "output/hornet_combined_corrected.csv",
+        "year_column": "Year",
+        "country_column": "Country",
+        "density_column": "hive_density",
+        "multiplier": 5,
+        "output_paths": ["output/bee_forecast_2026_to_2050.csv"],
+    },
+    {
+        "name": "realistic",
+        "hornet_path": predation_forecast_path,
+        "year_column": "year",
+        "country_column": "country",
+        "density_column": "adjusted_hive_density",
+        "multiplier": 3,
+        # Same table for bees/ and bees_predator_hornets/ (their Forecast_last.py are identical)
+        "output_paths": ["output/bee_forecast_2026_to_2050_realistic.csv",
+                         "../bees_predator_hornets/output/bee_forecast_2026_to_2050_realistic.csv"],
+    },
+]
+
+# === PROJECT ALL SCENARIOS ===
+df = run_bee_scenarios(scenarios, bee_trend_path, correlation_path)
+df.to_csv(output_path, index=False)
+print(f"✅ Bee forecast for {len(scenarios)} scenarios saved to: {output_path}")
+
+# === PER-SCENARIO TABLES (for the visualization scripts) ===
+for scenario in scenarios:
+    table = df[df["Scenario"] == scenario["name"]].drop(columns="Scenario")
+    for path in scenario.get("output_paths", []):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table.to_csv(path, index=False)
+        print(f"   {scenario['name']}: {path}")
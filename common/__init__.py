@@ -0,0 +1,3 @@
+"""
+Helpers shared by the historic_data, forecast, bees and predator scripts.
+"""
@@ -0,0 +1,172 @@
+"""
+File: common/bee_projection.py
+Description: Array engine for the bee-impact forecast. Hornet densities are pivoted once
+             into a dense year × country matrix; the one-year lag average, the non-linear
+             decline and its cap are then applied to all countries at once per year.
+             Several scenarios run together, with scenario as an extra array dimension.
+
+A scenario is a dict:
+    name             label written to the Scenario column
+    hornet_path      CSV with the hornet densities driving the decline
+    year_column, country_column, density_column
+                     columns of that CSV (default Year, Country, hive_density)
+    multiplier       k in the decline formula
+    default_correlation, decline_cap
+                     optional, default DEFAULT_CORRELATION and DECLINE_CAP
+"""
+
+import numpy as np
+import pandas as pd
+
+# Correlation used for countries without a fitted Density_vs_BeeGrowth_r
+DEFAULT_CORRELATION = -0.3
+
+# Decline = (lagged hornet density * multiplier) ** DECLINE_EXPONENT * |corr| * DECLINE_SCALE,
+# capped at DECLINE_CAP of the current bee density
+DECLINE_EXPONENT = 1.1
+DECLINE_SCALE = 2.0
+DECLINE_CAP = 0.5
+
+# Last observed bee year and the forecast horizon
+START_YEAR = 2024
+END_YEAR = 2050
+
+
+def hornet_density_matrix(hornets, years, countries, year_column="Year", country_column="Country",
+                          density_column="hive_density"):
+    """
+    Pivot the long hornet table into a (years, countries) array.
+
+    A country without a row in a year counts as density 0; the first row wins when a
+    (year, country) pair repeats. Also returns, per year, whether the table has any
+    rows for that year at all (years without rows get no lag average).
+    """
+    table = hornets.drop_duplicates(subset=[year_column, country_column])
+    index = pd.MultiIndex.from_product([years, countries])
+    matrix = (
+        table.set_index([year_column, country_column])[density_column]
+        .reindex(index, fill_value=0)
+        .to_numpy(dtype=float)
+        .reshape(len(years), len(countries))
+    )
+    year_present = np.isin(years, hornets[year_column].unique())
+    return matrix, year_present
+
+
+def lagged_hornet_density(matrix, year_present):
+    """
+    Average each year's density with the previous year's where the previous year has
+    data. Row 0 is the year before the forecast and only serves as the first lag;
+    the result has one row per forecast year (rows 1..).
+    """
+    current = matrix[1:]
+    lagged = np.where(year_present[:-1, None], (current + matrix[:-1]) / 2, current)
+    return lagged
+
+
+def advance_bee_density(density, hornet_density, correlation, multiplier, cap=DECLINE_CAP):
+    """
+    One year of bee decline given that year's lagged hornet density.
+    """
+    base_decline = (hornet_density * multiplier) ** DECLINE_EXPONENT * np.abs(correlation) * DECLINE_SCALE
+    decline = np.minimum(base_decline, cap * density)
+    return np.maximum(density - decline, 0)
+
+
+def project_bee_density(initial_density, hornet_density, correlation, multiplier, cap=DECLINE_CAP):
+    """
+    Advance bee density through the forecast years.
+
+    hornet_density is the lagged (years, countries) array; initial_density and
+    correlation are per-country vectors (they broadcast, so extra leading dimensions
+    work too). Returns the density after each year, shaped like hornet_density.
+    """
+    density = np.asarray(initial_density, dtype=float)
+    projected = np.empty(np.broadcast_shapes(hornet_density.shape, (1,) + density.shape))
+
+    for t in range(len(hornet_density)):
+        density = advance_bee_density(density, hornet_density[t], correlation, multiplier, cap)
+        projected[t] = density
+
+    return projected
+
+
+def bee_forecast_frame(years, countries, hornet_density, bee_density, area):
+    """
+    Long output table (Year, Country, Hornet_Density, Bee_Density, Bee_Count) sorted by
+    country and year, with Bee_Density_Growth as the yearly change per country.
+    """
+    n_years, n_countries = len(years), len(countries)
+    density = bee_density.ravel()
+    df = pd.DataFrame({
+        "Year": np.repeat(years, n_countries),
+        "Country": np.tile(np.asarray(countries, dtype=object), n_years),
+        "Hornet_Density": hornet_density.ravel(),
+        # Python's round() keeps the 6-decimal output identical to the previous dict loop
+        "Bee_Density": [round(d, 6) for d in density.tolist()],
+        # Nullable, so a missing density stays empty instead of becoming an arbitrary integer
+        "Bee_Count": pd.array(np.rint(bee_density * np.asarray(area, dtype=float)).ravel(), dtype="Int64"),
+    })
+    df = df.sort_values(by=["Country", "Year"])
+    df["Bee_Density_Growth"] = df.groupby("Country")["Bee_Density"].pct_change().round(4).fillna(0)
+    return df
+
+
+def load_bee_state(bee_trend_path, correlation_path, start_year=START_YEAR):
+    """
+    Bee density and area per country in start_year, and the fitted correlations.
+    """
+    bees = pd.read_csv(bee_trend_path)
+    latest_bees = bees[bees["Year"] == start_year][["Country", "Bee_Density", "Bee_Count", "Area_km2"]].dropna()
+    latest_bees = latest_bees.drop_duplicates(subset="Country", keep="last")
+
+    correlations = pd.read_csv(correlation_path).dropna(subset=["Density_vs_BeeGrowth_r"])
+    cor_map = correlations.set_index("Country")["Density_vs_BeeGrowth_r"].to_dict()
+    return latest_bees, cor_map
+
+
+def run_bee_scenarios(scenarios, bee_trend_path, correlation_path, start_year=START_YEAR, end_year=END_YEAR):
+    """
+    Project all scenarios in one pass over shared inputs: the bee and correlation tables
+    are read once and each hornet CSV once, however many scenarios use it.
+
+    Returns one long table: Scenario followed by the bee_forecast_frame columns,
+    scenarios in the given order.
+    """
+    latest_bees, cor_map = load_bee_state(bee_trend_path, correlation_path, start_year)
+    countries = latest_bees["Country"].tolist()
+    years = list(range(start_year + 1, end_year + 1))
+    matrix_years = [years[0] - 1] + years  # previous year first, for the lag
+
+    hornet_tables = {}
+    hornet, lagged = [], []
+    for scenario in scenarios:
+        path = scenario["hornet_path"]
+        if path not in hornet_tables:
+            hornet_tables[path] = pd.read_csv(path)
+        matrix, year_present = hornet_density_matrix(
+            hornet_tables[path], matrix_years, countries,
+            year_column=scenario.get("year_column", "Year"),
+            country_column=scenario.get("country_column", "Country"),
+            density_column=scenario.get("density_column", "hive_density"),
+        )
+        hornet.append(matrix[1:])
+        lagged.append(lagged_hornet_density(matrix, year_present))
+
+    # (years, scenarios, countries) so each step of the projection covers every scenario
+    lagged = np.stack(lagged, axis=1)
+    correlation = np.array([
+        [cor_map.get(country, scenario.get("default_correlation", DEFAULT_CORRELATION)) for country in countries]
+        for scenario in scenarios
+    ])
+    multiplier = np.array([[scenario["multiplier"]] for scenario in scenarios], dtype=float)
+    cap = np.array([[scenario.get("decline_cap", DECLINE_CAP)] for scenario in scenarios], dtype=float)
+    bee_density = project_bee_density(latest_bees["Bee_Density"].to_numpy(), lagged, correlation, multiplier, cap)
+
+    area = latest_bees["Area_km2"].to_numpy()
+    frames = []
+    for i, scenario in enumerate(scenarios):
+        df = bee_forecast_frame(years, countries, hornet[i], bee_density[:, i], area)
+        df.insert(0, "Scenario", scenario["name"])
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
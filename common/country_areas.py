@@ -0,0 +1,152 @@
+"""
+File: common/country_areas.py
+Description: Country areas (km²) from the Natural Earth shapefile, computed once in an
+             equal-area projection and cached next to the shapefile. The cache is keyed
+             by the size, mtime and content hash of every shapefile part that is read
+             (.shp geometry, .dbf names, .prj projection, ...), so edits to any of them
+             invalidate it. cached_for_shapefile is shared with the other tables
+             derived from the shapefile (see common.map_rendering).
+"""
+
+import os
+import json
+import hashlib
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Equal-area projection used for every area in the project
+AREA_EPSG = 6933
+CACHE_VERSION = 1
+
+# Shapefile parts read along with the .shp (index, attributes, projection, encoding)
+SHAPEFILE_PARTS = (".shp", ".shx", ".dbf", ".prj", ".cpg")
+
+
+def default_cache_path(shapefile_path):
+    return os.path.splitext(shapefile_path)[0] + "_areas.json"
+
+
+def shapefile_parts(shapefile_path):
+    """
+    The existing files of the shapefile, .shp first.
+    """
+    base = os.path.splitext(shapefile_path)[0]
+    return [base + ext for ext in SHAPEFILE_PARTS if os.path.exists(base + ext)]
+
+
+def shapefile_stat(shapefile_path):
+    """
+    {part extension: [size, mtime]} of every shapefile part.
+    """
+    stat = {}
+    for path in shapefile_parts(shapefile_path):
+        part = os.stat(path)
+        stat[os.path.splitext(path)[1]] = [part.st_size, part.st_mtime]
+    return stat
+
+
+def shapefile_fingerprint(shapefile_path):
+    """
+    SHA-1 over every shapefile part (the geometry in the .shp, names in the .dbf, ...).
+    """
+    digest = hashlib.sha1()
+    for path in shapefile_parts(shapefile_path):
+        digest.update(os.path.splitext(path)[1].encode("ascii"))
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def compute_country_areas(shapefile_path, name_column="ADMIN"):
+    """
+    Read the shapefile and compute each country's area in km² (EPSG:6933).
+    """
+    import geopandas as gpd
+
+    gdf = gpd.read_file(shapefile_path)
+    logger.info(f"Loaded country shapefile from {shapefile_path} with {len(gdf)} records.")
+    gdf = gdf.to_crs(epsg=AREA_EPSG)
+    areas = gdf.geometry.area / 1e6
+    names = gdf[name_column].str.strip()
+    return dict(zip(names, areas.astype(float)))
+
+
+def _read_cache(cache_path):
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(cache_path, cache):
+    try:
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False, indent=1)
+    except OSError as e:
+        logger.warning(f"Could not write cache {cache_path}: {e}")
+
+
+def cached_for_shapefile(shapefile_path, cache_path, key, field, compute):
+    """
+    Return cache[field] if the JSON cache at cache_path was built from the current
+    shapefile with the same key; otherwise call compute(), cache its result and return it.
+
+    Matching sizes and mtimes of all shapefile parts are trusted as-is; otherwise the
+    content hash decides whether the cached value is still valid.
+    """
+    os.stat(shapefile_path)  # a missing shapefile raises, as gpd.read_file would
+    stat = shapefile_stat(shapefile_path)
+    cache = _read_cache(cache_path)
+
+    if cache and cache.get("key") == key:
+        if cache.get("stat") == stat:
+            return cache[field]
+        fingerprint = shapefile_fingerprint(shapefile_path)
+        if cache.get("sha1") == fingerprint:
+            cache["stat"] = stat
+            _write_cache(cache_path, cache)
+            return cache[field]
+    else:
+        fingerprint = shapefile_fingerprint(shapefile_path)
+
+    value = compute()
+    _write_cache(cache_path, {
+        "key": key,
+        "stat": stat,
+        "sha1": fingerprint,
+        field: value,
+    })
+    logger.info(f"Cached {field} in {cache_path}")
+    return value
+
+
+def load_country_areas(shapefile_path, name_column="ADMIN", cache_path=None):
+    """
+    Return {country name: area_km2}, served from the cache when the shapefile is unchanged.
+    """
+    cache_path = cache_path or default_cache_path(shapefile_path)
+    key = {"version": CACHE_VERSION, "epsg": AREA_EPSG, "name_column": name_column}
+    return cached_for_shapefile(shapefile_path, cache_path, key, "areas",
+                                lambda: compute_country_areas(shapefile_path, name_column))
+
+
+def country_area_table(shapefile_path, country_column="country", area_column="area_km2", **kwargs):
+    """
+    The cached areas as a two-column DataFrame, ready to merge on country name.
+    """
+    areas = load_country_areas(shapefile_path, **kwargs)
+    return pd.DataFrame({country_column: list(areas.keys()), area_column: list(areas.values())})
+
+
+def area_vector(countries, shapefile_path, **kwargs):
+    """
+    Areas aligned to the given country order; NaN where a country is not in the shapefile.
+    """
+    areas = load_country_areas(shapefile_path, **kwargs)
+    return np.array([areas.get(c, np.nan) for c in countries], dtype=float)
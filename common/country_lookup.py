@@ -0,0 +1,78 @@
+"""
+File: common/country_lookup.py
+Description: Offline point-in-polygon country assignment over the Natural Earth country
+             polygons. Polygons are indexed once per process with an STRtree and points
+             are resolved in vectorized batches. The same index gives each country's
+             land-border neighbors.
+"""
+
+import logging
+from functools import lru_cache
+
+import numpy as np
+import shapely
+
+logger = logging.getLogger(__name__)
+
+# Coastal sightings can fall just outside the coarse 1:110m outlines; such points take
+# the nearest country within this distance (in degrees, roughly 25 km).
+DEFAULT_NEAREST_WITHIN_DEG = 0.25
+
+
+@lru_cache(maxsize=None)
+def load_country_index(shapefile_path, name_column="ADMIN"):
+    """
+    Read the country polygons and build the spatial index. Cached per process.
+    Returns (names, geometries, tree).
+    """
+    import geopandas as gpd
+
+    gdf = gpd.read_file(shapefile_path)[[name_column, "geometry"]].to_crs(epsg=4326)
+    names = gdf[name_column].str.strip().to_numpy(dtype=object)
+    geometries = gdf.geometry.to_numpy()
+    logger.info(f"Indexed {len(names)} country polygons from {shapefile_path}")
+    return names, geometries, shapely.STRtree(geometries)
+
+
+def assign_countries(lat, lon, shapefile_path, name_column="ADMIN",
+                     nearest_within_deg=DEFAULT_NEAREST_WITHIN_DEG):
+    """
+    Country name for every (lat, lon) pair, as an object array with None where no country
+    matches. Points on a shared border take the first matching polygon in file order.
+    """
+    names, _, tree = load_country_index(shapefile_path, name_column)
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    points = shapely.points(lon, lat)
+    result = np.full(len(points), None, dtype=object)
+    if len(points) == 0:
+        return result
+
+    point_idx, polygon_idx = tree.query(points, predicate="intersects")
+    order = np.lexsort((polygon_idx, point_idx))
+    point_idx, polygon_idx = point_idx[order], polygon_idx[order]
+    first = np.unique(point_idx, return_index=True)[1]
+    result[point_idx[first]] = names[polygon_idx[first]]
+
+    unmatched = np.flatnonzero(np.equal(result, None) & np.isfinite(lat) & np.isfinite(lon))
+    if nearest_within_deg and len(unmatched):
+        near_point, near_polygon = tree.query_nearest(
+            points[unmatched], max_distance=nearest_within_deg, all_matches=False
+        )
+        result[unmatched[near_point]] = names[near_polygon]
+
+    return result
+
+
+def border_neighbors(shapefile_path, name_column="ADMIN"):
+    """
+    Land-border neighbors of every country of the shapefile: the countries whose polygons
+    touch or overlap its own. Returns {name: [neighbor names in alphabetical order]}.
+    """
+    names, geometries, tree = load_country_index(shapefile_path, name_column)
+    left, right = tree.query(geometries, predicate="intersects")
+    neighbors = {name: set() for name in names}
+    for i, j in zip(left, right):
+        if names[i] != names[j]:
+            neighbors[names[i]].add(names[j])
+    return {name: sorted(listed) for name, listed in neighbors.items()}
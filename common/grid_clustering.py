@@ -0,0 +1,150 @@
+"""
+File: common/grid_clustering.py
+Description: Proximity clustering of lat/lon points without DBSCAN. With min_samples=1,
+             DBSCAN with a haversine eps yields the connected components of the
+             "within eps" graph. This engine finds the same components in near-linear
+             time: points are bucketed into a grid, only nearby cells are compared and
+             components are merged with an array-based union-find.
+"""
+
+import itertools
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Upper bound on point pairs compared at once, keeps memory flat for dense cells
+PAIR_BATCH_SIZE = 2_000_000
+
+
+def _unit_vectors(lat_deg, lon_deg):
+    lat = np.radians(np.asarray(lat_deg, dtype=float))
+    lon = np.radians(np.asarray(lon_deg, dtype=float))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def _find_roots(parent):
+    """
+    Path compression by pointer jumping until every entry points at its root.
+    """
+    while True:
+        grand = parent[parent]
+        if np.array_equal(grand, parent):
+            return parent
+        parent = grand
+
+
+def _union(parent, a, b):
+    """
+    Merge the sets of every (a[k], b[k]) pair. Roots always hook onto the smaller root,
+    so no cycles can form.
+    """
+    while True:
+        parent = _find_roots(parent)
+        ra, rb = parent[a], parent[b]
+        differ = ra != rb
+        if not differ.any():
+            return parent
+        lo = np.minimum(ra[differ], rb[differ])
+        hi = np.maximum(ra[differ], rb[differ])
+        np.minimum.at(parent, hi, lo)
+
+
+def _cell_pairs_connected(xyz, order, starts, counts, cells_a, cells_b, chord_sq):
+    """
+    For each (cells_a[k], cells_b[k]) cell pair, whether any point of one is within the
+    chord distance of any point of the other.
+    """
+    connected = np.zeros(len(cells_a), dtype=bool)
+    n_pairs = counts[cells_a] * counts[cells_b]
+
+    batch_start = 0
+    cumulative = np.cumsum(n_pairs)
+    while batch_start < len(cells_a):
+        done = cumulative[batch_start - 1] if batch_start else 0
+        batch_end = max(int(np.searchsorted(cumulative, done + PAIR_BATCH_SIZE, side="right")), batch_start + 1)
+        batch = np.arange(batch_start, batch_end)
+
+        sizes = n_pairs[batch]
+        owner = np.repeat(batch, sizes)
+        k = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        width = counts[cells_b[owner]]
+        i = order[starts[cells_a[owner]] + k // width]
+        j = order[starts[cells_b[owner]] + k % width]
+
+        close = ((xyz[i] - xyz[j]) ** 2).sum(axis=1) <= chord_sq
+        connected[np.unique(owner[close])] = True
+        batch_start = batch_end
+
+    return connected
+
+
+def grid_cluster(lat_deg, lon_deg, eps_km, earth_radius_km=EARTH_RADIUS_KM):
+    """
+    Label points so that any two points within eps_km (great-circle) share a label.
+
+    Gives the same labels as
+    DBSCAN(eps=eps_km / earth_radius_km, min_samples=1, metric='haversine'):
+    components are numbered 0, 1, 2, ... in order of their first point.
+    """
+    xyz = _unit_vectors(lat_deg, lon_deg)
+    n = len(xyz)
+    if n == 0:
+        return np.zeros(0, dtype=int)
+
+    # Great-circle eps → straight-line (chord) distance between unit vectors
+    chord = 2 * np.sin(eps_km / earth_radius_km / 2)
+    chord_sq = chord ** 2
+
+    # Cell side chosen so any two points in one cell are within eps of each other
+    side = chord / np.sqrt(3)
+    reach = int(np.ceil(chord / side))
+    cell_xyz = np.floor(xyz / side).astype(np.int64)
+    cell_xyz -= cell_xyz.min(axis=0) - reach
+    span = cell_xyz.max(axis=0) + reach + 1
+    if np.prod(span.astype(float)) >= 2 ** 62:
+        raise ValueError(f"eps_km={eps_km} is too small for the extent of the data")
+    strides = np.array([span[1] * span[2], span[2], 1], dtype=np.int64)
+    point_keys = cell_xyz @ strides
+
+    # Group points by cell
+    order = np.argsort(point_keys, kind="stable")
+    keys, starts, counts = np.unique(point_keys[order], return_index=True, return_counts=True)
+    point_cell = np.empty(n, dtype=np.int64)
+    point_cell[order] = np.repeat(np.arange(len(keys)), counts)
+
+    # Union-find over cells: every cell is internally connected already
+    parent = np.arange(len(keys))
+
+    for offset in itertools.product(range(-reach, reach + 1), repeat=3):
+        if offset <= (0, 0, 0):
+            continue  # each unordered neighbor pair is visited once
+        gap = np.maximum(np.abs(offset) - 1, 0) * side
+        if (gap ** 2).sum() > chord_sq:
+            continue  # no two points of these cells can be within eps
+
+        neighbor_keys = keys + np.dot(offset, strides)
+        found = np.searchsorted(keys, neighbor_keys)
+        found[found == len(keys)] = 0
+        present = keys[found] == neighbor_keys
+        cells_a = np.flatnonzero(present)
+        cells_b = found[present]
+
+        # Skip pairs that earlier offsets already joined
+        parent = _find_roots(parent)
+        pending = parent[cells_a] != parent[cells_b]
+        cells_a, cells_b = cells_a[pending], cells_b[pending]
+        if len(cells_a) == 0:
+            continue
+
+        connected = _cell_pairs_connected(xyz, order, starts, counts, cells_a, cells_b, chord_sq)
+        parent = _union(parent, cells_a[connected], cells_b[connected])
+
+    roots = _find_roots(parent)[point_cell]
+
+    # Number components by first appearance, like DBSCAN
+    _, first_index, inverse = np.unique(roots, return_index=True, return_inverse=True)
+    rank = np.empty(len(first_index), dtype=int)
+    rank[np.argsort(first_index)] = np.arange(len(first_index))
+    return rank[inverse]
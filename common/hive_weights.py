@@ -0,0 +1,79 @@
+"""
+File: common/hive_weights.py
+Description: Fallback hierarchy for the hive weights of historic_data/CoutriesTableCreation.py.
+             Rows without an exact (year, country) weight take, in order: the country
+             average, the neighbors' weights within ±1 year, the year average and the
+             global average. Every level is a precomputed lookup table and all rows
+             are resolved at once with np.select.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Fallback levels in the order they are tried; weight_source names the level used
+WEIGHT_SOURCES = ['exact', 'country_avg', 'neighbor_avg', 'year_avg', 'global_avg']
+
+# Bounds of weights inferred from neighbors, year or global averages
+INFERRED_WEIGHT_BOUNDS = (0.1, 10.0)
+
+
+def clamp(values, min_val, max_val):
+    """
+    Element-wise max(min_val, min(value, max_val)), so NaN becomes min_val.
+    """
+    values = np.asarray(values, dtype=float)
+    return np.where(np.isnan(values), min_val, np.clip(values, min_val, max_val))
+
+
+def neighbor_weight_table(weights_df, neighbors, year_window=1):
+    """
+    Mean of the known neighbor weights within ±year_window years, for every (country, year)
+    that has any. Weights are summed in neighbor order, then table order, as the
+    per-row loop did.
+    """
+    pairs = pd.DataFrame([(country, neighbor, rank) for country, listed in neighbors.items()
+                          for rank, neighbor in enumerate(listed)], columns=['country', 'neighbor', 'rank'])
+    known = weights_df.dropna(subset=['final_weight'])[['country', 'year', 'final_weight']]
+    known = known.rename(columns={'country': 'neighbor'}).assign(row=np.arange(len(known)))
+    # A weight of year y counts for the years y - year_window .. y + year_window
+    shifted = pd.concat([known.assign(year=known['year'] + d) for d in range(-year_window, year_window + 1)])
+
+    near = pairs.merge(shifted, on='neighbor').sort_values(['country', 'year', 'rank', 'row'])
+    group = near.groupby(['country', 'year'], sort=False).ngroup().to_numpy()
+    table = near.drop_duplicates(subset=['country', 'year'])[['country', 'year']].reset_index(drop=True)
+    table['neighbor_avg'] = np.bincount(group, weights=near['final_weight']) / np.bincount(group)
+    return table
+
+
+def resolve_weights(merged, weights_df, neighbors):
+    """
+    Final weight and weight source of every row of merged ('year', 'country' and the
+    exact 'final_weight', NaN where missing), in row order.
+
+    Exact and country-average weights are clamped to the observed weight range, inferred
+    ones to INFERRED_WEIGHT_BOUNDS.
+    """
+    country_avg = weights_df.groupby('country')['final_weight'].mean()
+    year_avg = weights_df.groupby('year')['final_weight'].mean()
+    global_avg = weights_df['final_weight'].mean()
+    global_min = weights_df['final_weight'].min()
+    global_max = weights_df['final_weight'].max()
+    low, high = INFERRED_WEIGHT_BOUNDS
+
+    lookup = merged[['year', 'country']].merge(neighbor_weight_table(weights_df, neighbors), on=['year', 'country'],
+                                               how='left', indicator='neighbor_match')
+    conditions = [
+        merged['final_weight'].notna().to_numpy(),
+        merged['country'].isin(country_avg.index).to_numpy(),
+        (lookup['neighbor_match'] == 'both').to_numpy(),
+        merged['year'].isin(year_avg.index).to_numpy(),
+    ]
+    choices = [
+        clamp(merged['final_weight'], global_min, global_max),
+        clamp(merged['country'].map(country_avg), global_min, global_max),
+        clamp(lookup['neighbor_avg'], low, high),
+        clamp(merged['year'].map(year_avg), low, high),
+    ]
+    weights = np.select(conditions, choices, default=clamp(global_avg, low, high))
+    sources = np.select(conditions, WEIGHT_SOURCES[:-1], default=WEIGHT_SOURCES[-1])
+    return weights, sources
@@ -0,0 +1,24 @@
+"""
+File: common/http_session.py
+Description: Pooled HTTP session shared by the data download scripts (GBIF, Movebank).
+             One session serves all worker threads: connections to a host are kept alive
+             and reused, and failed requests are retried with back-off.
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def pooled_session(pool_size, retries=5):
+    """
+    Session with up to pool_size keep-alive connections per host, retrying connection
+    errors, 429 and 5xx responses.
+    """
+    retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=("GET",))
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
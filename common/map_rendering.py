@@ -0,0 +1,211 @@
+"""
+File: common/map_rendering.py
+Description: Shared renderer for the per-year choropleth maps. The Europe base geometry
+             (largest polygon per country plus its label anchor) is prepared once, then
+             years are drawn in parallel worker processes that each hold one read-only
+             copy of it. Per year only a value vector aligned to the base is shipped.
+
+The base table for every country of the shapefile is cached next to it as JSON (WKB
+geometry + anchor), invalidated like the country area cache when the shapefile changes.
+"""
+
+import os
+import logging
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+import shapely
+import matplotlib.pyplot as plt
+
+from common.country_areas import cached_for_shapefile
+
+logger = logging.getLogger(__name__)
+
+BASEMAP_CACHE_VERSION = 1
+
+# Defaults shared by the density maps
+BOUNDARY_KWARGS = {"color": "grey", "linewidth": 0.5}
+MISSING_KWARGS = {"color": "lightgrey", "label": "No data"}
+LABEL_KWARGS = {"fontsize": 6, "ha": "center", "va": "center", "color": "black"}
+
+
+def mainland_geometry(world, names, name_column="NAME"):
+    """
+    Keep the largest polygon of each listed country and add its label anchor.
+
+    Returns a GeoDataFrame with one row per country found, sorted by name, with the
+    name in a "name" column and the centroid of the kept polygon in label_x/label_y.
+    """
+    names = {str(n).strip() for n in names}
+    base = world[[name_column, "geometry"]].rename(columns={name_column: "name"})
+    base["name"] = base["name"].str.strip()
+    base = base[base["name"].isin(names)]
+    base = base.explode(index_parts=True).reset_index(drop=True)
+    base["area"] = base.geometry.area
+    base = base.sort_values(by=["name", "area"], ascending=[True, False])
+    base = base.drop_duplicates(subset="name", keep="first").reset_index(drop=True)
+
+    centroids = base.geometry.centroid
+    base["label_x"] = centroids.x
+    base["label_y"] = centroids.y
+    return base.drop(columns="area")
+
+
+def default_basemap_cache_path(shapefile_path, name_column):
+    return os.path.splitext(shapefile_path)[0] + f"_mainland_{name_column}.json"
+
+
+def _compute_basemap(shapefile_path, name_column):
+    import geopandas as gpd
+
+    world = gpd.read_file(shapefile_path)
+    base = mainland_geometry(world, world[name_column].dropna().unique(), name_column)
+    return {
+        "crs": world.crs.to_wkt() if world.crs is not None else None,
+        "name": base["name"].tolist(),
+        "wkb": shapely.to_wkb(base.geometry.to_numpy(), hex=True).tolist(),
+        "label_x": base["label_x"].tolist(),
+        "label_y": base["label_y"].tolist(),
+    }
+
+
+def load_mainland_geometry(shapefile_path, names=None, name_column="NAME", cache_path=None):
+    """
+    Cached equivalent of mainland_geometry(gpd.read_file(shapefile_path), names, name_column).
+    With names=None every country of the shapefile is returned.
+    """
+    import geopandas as gpd
+
+    cache_path = cache_path or default_basemap_cache_path(shapefile_path, name_column)
+    key = {"version": BASEMAP_CACHE_VERSION, "name_column": name_column}
+    table = cached_for_shapefile(shapefile_path, cache_path, key, "basemap",
+                                 lambda: _compute_basemap(shapefile_path, name_column))
+
+    base = gpd.GeoDataFrame(
+        pd.DataFrame({"name": table["name"], "label_x": table["label_x"], "label_y": table["label_y"]}),
+        geometry=shapely.from_wkb(np.array(table["wkb"], dtype=object)),
+        crs=table["crs"],
+    )[["name", "geometry", "label_x", "label_y"]]
+    if names is not None:
+        base = base[base["name"].isin({str(n).strip() for n in names})].reset_index(drop=True)
+    return base
+
+
+def year_values(data, base, year_column, name_column, value_column, label_column=None):
+    """
+    Split the long table into per-year tasks: (year, values, labels), with the value and
+    label vectors aligned to the rows of base (NaN where a country has no data).
+    """
+    data = data.assign(**{name_column: data[name_column].astype(str).str.strip()})
+    data = data.drop_duplicates(subset=[year_column, name_column])
+    columns = [value_column] + ([label_column] if label_column else [])
+    table = data.set_index([year_column, name_column])[columns]
+
+    tasks = []
+    for year in sorted(data[year_column].unique()):
+        aligned = table.loc[year].reindex(base["name"])
+        labels = aligned[label_column].to_numpy(dtype=float) if label_column else None
+        tasks.append((year, aligned[value_column].to_numpy(dtype=float), labels))
+    return tasks
+
+
+# Base geometry and map spec held by each worker, set once by init_renderer
+_render_inputs = {}
+
+
+def init_renderer(base, spec):
+    if spec["output_path"] is not None:
+        plt.switch_backend("Agg")
+    _render_inputs["base"] = base
+    _render_inputs["spec"] = spec
+
+
+def render_year(task):
+    """
+    Draw one year's map and save it, or show it when the spec has no output path.
+    Returns the written path (None when shown).
+    """
+    year, values, labels = task
+    base = _render_inputs["base"]
+    spec = _render_inputs["spec"]
+    frame = base.assign(value=values)
+
+    fig, ax = plt.subplots(figsize=spec["figsize"])
+    frame.boundary.plot(ax=ax, **spec["boundary_kwargs"])
+    frame.plot(ax=ax, column="value", missing_kwds=spec["missing_kwargs"], **spec["plot_kwargs"])
+
+    if spec["colorbar_label"]:
+        # Fixed colorbar from the norm/cmap of the plot, identical across years
+        sm = plt.cm.ScalarMappable(norm=spec["plot_kwargs"]["norm"], cmap=spec["plot_kwargs"]["cmap"])
+        sm.set_array([])
+        cbar = fig.colorbar(sm, ax=ax, shrink=0.7)
+        cbar.set_label(spec["colorbar_label"], fontsize=10)
+
+    if labels is not None:
+        show = np.flatnonzero(~np.isnan(labels) & (labels > 0))
+        for x, y, count in zip(base["label_x"].to_numpy()[show], base["label_y"].to_numpy()[show], labels[show]):
+            ax.text(x, y, f"{int(count)}", **spec["label_kwargs"])
+
+    ax.set_title(spec["title"].format(year=year), fontsize=14)
+    ax.axis("off")
+    plt.tight_layout()
+    if spec["output_path"] is None:
+        plt.show()
+        plt.close(fig)
+        return None
+    path = spec["output_path"].format(year=year)
+    plt.savefig(path, dpi=spec["dpi"])
+    plt.close(fig)
+    return path
+
+
+def render_yearly_maps(data, base, year_column, name_column, value_column, output_path, title,
+                       label_column=None, plot_kwargs=None, boundary_kwargs=BOUNDARY_KWARGS,
+                       missing_kwargs=MISSING_KWARGS, label_kwargs=LABEL_KWARGS,
+                       colorbar_label=None, figsize=(11, 9), dpi=200, n_workers=None):
+    """
+    Render one choropleth per year of `data` over the base from load_mainland_geometry.
+
+    output_path and title are format strings with a {year} field; with output_path=None
+    each map is shown with plt.show() instead, one year after the other in this process
+    and on the current backend. Countries are colored
+    by value_column and, if label_column is given, labelled with its value where > 0.
+    plot_kwargs go to GeoDataFrame.plot (cmap, vmin/vmax or norm, legend, ...); with
+    colorbar_label a fixed colorbar is drawn from plot_kwargs' norm and cmap.
+
+    Years are rendered on n_workers processes (default: all CPUs). Worker processes are
+    forked so the scripts need no __main__ guard; where fork is unavailable the maps
+    are rendered serially. Returns the written paths in year order.
+    """
+    spec = {
+        "output_path": output_path,
+        "title": title,
+        "plot_kwargs": plot_kwargs or {},
+        "boundary_kwargs": boundary_kwargs,
+        "missing_kwargs": missing_kwargs,
+        "label_kwargs": label_kwargs,
+        "colorbar_label": colorbar_label,
+        "figsize": figsize,
+        "dpi": dpi,
+    }
+    tasks = year_values(data, base, year_column, name_column, value_column, label_column)
+    n_workers = min(n_workers or os.cpu_count(), len(tasks))
+
+    if output_path is None:
+        init_renderer(base, spec)
+        paths = [render_year(task) for task in tasks]
+    elif n_workers <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        backend = plt.get_backend()
+        init_renderer(base, spec)
+        try:
+            paths = [render_year(task) for task in tasks]
+        finally:
+            plt.switch_backend(backend)
+    else:
+        context = multiprocessing.get_context("fork")
+        with context.Pool(n_workers, initializer=init_renderer, initargs=(base, spec)) as pool:
+            paths = pool.map(render_year, tasks)
+
+    logger.info(f"Rendered {len(paths)} maps with {max(n_workers, 1)} workers")
+    return paths
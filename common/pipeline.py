@@ -0,0 +1,350 @@
+"""
+File: common/pipeline.py
+Description: Content-addressed runner for the project's script chain. Each stage declares
+             the script it runs, the folder it runs in and the files it reads and writes.
+             A stage is fingerprinted by the SHA-1 of its code (the script plus the local
+             modules it imports) and of its input files; it is skipped while that
+             fingerprint is unchanged and its outputs are still the files it wrote.
+             Stages whose inputs are ready run in parallel.
+
+A stage is a dict:
+    name       unique label, used on the command line and in the state file
+    script     path of the script, relative to the project root
+    cwd        folder the script runs in (default: the script's folder); the scripts
+               use paths relative to it
+    inputs     files or folders read by the script, relative to cwd
+    outputs    files written by the script, relative to cwd
+
+Stages are linked through their paths: a stage reading a file another stage writes runs
+after it. A stage may rewrite one of its own inputs (adaptNumbers.py); it is then
+fingerprinted with the version the previous writer produced, so it is not re-applied
+to its own output, and it runs again whenever the previous writer has run after it.
+
+Since fingerprints are taken from file contents, a stage re-run with identical output
+(e.g. after a comment-only change) does not invalidate the stages after it.
+"""
+
+import os
+import ast
+import sys
+import json
+import time
+import hashlib
+import logging
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+logger = logging.getLogger(__name__)
+
+STATE_VERSION = 1
+
+
+def hash_file(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class FileHasher:
+    """
+    SHA-1 of files and folders. A file whose size and mtime match the previous run is
+    trusted to have the recorded hash, so unchanged inputs are not re-read.
+    """
+
+    def __init__(self, known=None):
+        self.known = dict(known or {})
+
+    def file(self, path):
+        stat = os.stat(path)
+        entry = self.known.get(path)
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            return entry["sha1"]
+        sha1 = hash_file(path)
+        self.known[path] = {"size": stat.st_size, "mtime": stat.st_mtime, "sha1": sha1}
+        return sha1
+
+    def __call__(self, path):
+        """
+        Hash of a file, of a folder (names and hashes of every file below it) or None
+        when the path does not exist.
+        """
+        if os.path.isfile(path):
+            return self.file(path)
+        if not os.path.isdir(path):
+            return None
+        digest = hashlib.sha1()
+        for folder, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(folder, name)
+                digest.update(os.path.relpath(file_path, path).encode("utf-8"))
+                digest.update(self.file(file_path).encode("ascii"))
+        return digest.hexdigest()
+
+
+def code_dependencies(script, root):
+    """
+    The script and, recursively, the project modules it imports: modules next to the
+    importing file (forecast_engine) and modules of packages under root (common.storage).
+    """
+    found = []
+    pending = [os.path.abspath(script)]
+    while pending:
+        path = pending.pop()
+        if path in found:
+            continue
+        found.append(path)
+        with open(path, "rb") as f:
+            tree = ast.parse(f.read(), filename=path)
+
+        names = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names.append(node.module)
+                names.extend(f"{node.module}.{alias.name}" for alias in node.names)
+
+        for name in names:
+            relative = os.path.join(*name.split(".")) + ".py"
+            for base in (os.path.dirname(path), root):
+                candidate = os.path.join(base, relative)
+                if os.path.isfile(candidate):
+                    pending.append(os.path.abspath(candidate))
+                    break
+    return sorted(found)
+
+
+def _read_state(state_path):
+    try:
+        with open(state_path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {"version": STATE_VERSION, "files": {}, "stages": {}}
+    if state.get("version") != STATE_VERSION:
+        return {"version": STATE_VERSION, "files": {}, "stages": {}}
+    return state
+
+
+def _write_state(state_path, state):
+    os.makedirs(os.path.dirname(state_path) or ".", exist_ok=True)
+    staging = state_path + ".tmp"
+    with open(staging, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(staging, state_path)
+
+
+class Pipeline:
+    """
+    Runs declared stages from the project root, keeping fingerprints and file hashes in
+    <state_dir>/state.json and each stage's console output in <state_dir>/logs/.
+    """
+
+    def __init__(self, stages, root, state_dir=".pipeline", python=sys.executable):
+        self.root = os.path.abspath(root)
+        self.state_dir = os.path.join(self.root, state_dir)
+        self.state_path = os.path.join(self.state_dir, "state.json")
+        self.python = python
+
+        self.stages = {}
+        for stage in stages:
+            if stage["name"] in self.stages:
+                raise ValueError(f"Duplicate stage name '{stage['name']}'")
+            cwd = stage.get("cwd") or os.path.dirname(stage["script"])
+            self.stages[stage["name"]] = dict(
+                stage,
+                cwd=cwd,
+                inputs=[self._key(cwd, p) for p in stage.get("inputs", [])],
+                outputs=[self._key(cwd, p) for p in stage.get("outputs", [])],
+            )
+        self.order = list(self.stages)
+
+        # Writers of every path in declaration order
+        self.writers = {}
+        for name in self.order:
+            for path in self.stages[name]["outputs"]:
+                self.writers.setdefault(path, []).append(name)
+        self.upstream = {name: self._upstream(name) for name in self.order}
+
+    def _key(self, cwd, path):
+        # Paths are compared and stored relative to the root
+        return os.path.relpath(os.path.normpath(os.path.join(self.root, cwd, path)), self.root)
+
+    def _producer(self, name, path):
+        """
+        The stage whose version of path this stage reads: the writer declared just before
+        it if it rewrites the file itself, otherwise the last writer.
+        """
+        writers = self.writers.get(path, [])
+        if name in writers:
+            i = writers.index(name)
+            return writers[i - 1] if i else None
+        return writers[-1] if writers else None
+
+    def _upstream(self, name):
+        upstream = set()
+        for path in self.stages[name]["inputs"]:
+            producer = self._producer(name, path)
+            if producer:
+                upstream.add(producer)
+        for path in self.stages[name]["outputs"]:
+            # Earlier writers of the same file run first
+            writers = self.writers[path]
+            upstream.update(writers[:writers.index(name)])
+        return upstream
+
+    def selection(self, targets=None):
+        """
+        The named stages and everything they depend on, in declaration order.
+        """
+        if not targets:
+            return list(self.order)
+        unknown = [t for t in targets if t not in self.stages]
+        if unknown:
+            raise KeyError(f"Unknown stages: {', '.join(unknown)}")
+        selected, pending = set(), list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in selected:
+                selected.add(name)
+                pending.extend(self.upstream[name])
+        return [name for name in self.order if name in selected]
+
+    def fingerprint(self, name, state, hasher):
+        """
+        SHA-1 over the stage's code and inputs. Missing inputs raise FileNotFoundError.
+        """
+        stage = self.stages[name]
+        code = {
+            os.path.relpath(path, self.root): hasher(path)
+            for path in code_dependencies(os.path.join(self.root, stage["script"]), self.root)
+        }
+        inputs = {}
+        for path in stage["inputs"]:
+            producer = self._producer(name, path) if path in stage["outputs"] else None
+            record = state["stages"].get(producer, {}) if producer else {}
+            sha1 = record.get("outputs", {}).get(path) or hasher(os.path.join(self.root, path))
+            if sha1 is None:
+                raise FileNotFoundError(f"Stage '{name}' is missing its input {path}")
+            inputs[path] = sha1
+
+        payload = json.dumps({"cwd": stage["cwd"], "code": code, "inputs": inputs}, sort_keys=True)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def outputs_current(self, name, state, hasher):
+        """
+        True when every output exists with the hash recorded by the stage that last wrote it.
+        A stage rewriting a file an earlier stage wrote must itself be that last writer:
+        if the earlier stage ran again since, even with identical output, the file no
+        longer holds the rewrite.
+        """
+        for path in self.stages[name]["outputs"]:
+            writers = self.writers[path]
+            records = {w: state["stages"][w] for w in writers if w in state["stages"]}
+            if not records:
+                return False
+            last = max(records, key=lambda w: records[w]["finished"])
+            if writers.index(name) > 0 and last != name:
+                return False
+            latest = records[last]
+            if hasher(os.path.join(self.root, path)) != latest["outputs"].get(path):
+                return False
+        return True
+
+    def is_current(self, name, state, hasher, fingerprint):
+        record = state["stages"].get(name)
+        return bool(record) and record["fingerprint"] == fingerprint and self.outputs_current(name, state, hasher)
+
+    def run_stage(self, name):
+        """
+        Run one stage's script in its folder. Returns (exit code, log path).
+        """
+        stage = self.stages[name]
+        cwd = os.path.join(self.root, stage["cwd"])
+        for path in stage["outputs"]:
+            os.makedirs(os.path.dirname(os.path.join(self.root, path)), exist_ok=True)
+
+        log_path = os.path.join(self.state_dir, "logs", f"{name}.log")
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        with open(log_path, "w", encoding="utf-8") as log:
+            result = subprocess.run([self.python, os.path.join(self.root, stage["script"])],
+                                    cwd=cwd, stdout=log, stderr=subprocess.STDOUT)
+        return result.returncode, log_path
+
+    def run(self, targets=None, force=(), n_workers=4, dry_run=False):
+        """
+        Bring the selected stages up to date. Stages in `force` run even when current.
+        With dry_run, only report which stages would run; the stages after one that would
+        run are reported as pending, since their inputs are not known yet.
+
+        Returns {stage name: status}, status being one of "current", "ran", "failed",
+        "blocked" (an upstream stage failed), "would run" or "pending" (dry run).
+        """
+        selected = self.selection(targets)
+        state = _read_state(self.state_path)
+        hasher = FileHasher(state["files"])
+        status, running, fingerprints = {}, {}, {}
+
+        def ready():
+            return [name for name in selected if name not in status and name not in running.values()
+                    and all(status.get(u) in ("current", "ran") for u in self.upstream[name] if u in selected)]
+
+        def finish(name, code, log_path):
+            missing = [p for p in self.stages[name]["outputs"] if not os.path.exists(os.path.join(self.root, p))]
+            if code != 0 or missing:
+                status[name] = "failed"
+                state["stages"].pop(name, None)
+                reason = f"exit code {code}" if code != 0 else f"did not write {', '.join(missing)}"
+                logger.error(f"❌ {name}: {reason}, see {log_path}")
+                return
+
+            outputs = {}
+            for path in self.stages[name]["outputs"]:
+                # Rewritten files are hashed again even if size and mtime look unchanged
+                hasher.known.pop(os.path.join(self.root, path), None)
+                outputs[path] = hasher(os.path.join(self.root, path))
+            state["stages"][name] = {"fingerprint": fingerprints[name], "outputs": outputs, "finished": time.time()}
+            status[name] = "ran"
+            logger.info(f"✅ {name}: done")
+
+        with ThreadPoolExecutor(max_workers=max(n_workers, 1)) as pool:
+            while True:
+                for name in ready():
+                    try:
+                        fingerprints[name] = self.fingerprint(name, state, hasher)
+                    except FileNotFoundError as e:
+                        status[name] = "failed"
+                        logger.error(f"❌ {name}: {e}")
+                        continue
+
+                    if name not in force and self.is_current(name, state, hasher, fingerprints[name]):
+                        status[name] = "current"
+                        logger.info(f"✔️  {name}: up to date")
+                    elif dry_run:
+                        status[name] = "would run"
+                    else:
+                        logger.info(f"▶️  {name}: running {self.stages[name]['script']}")
+                        running[pool.submit(self.run_stage, name)] = name
+
+                if not running:
+                    if not ready():
+                        break
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish(running.pop(future), *future.result())
+                state["files"] = hasher.known
+                _write_state(self.state_path, state)
+
+        for name in selected:
+            if name not in status:
+                status[name] = "pending" if dry_run else "blocked"
+                if not dry_run:
+                    logger.warning(f"⏭️  {name}: skipped, an upstream stage failed")
+        if not dry_run:
+            state["files"] = hasher.known
+            _write_state(self.state_path, state)
+        return status
@@ -0,0 +1,141 @@
+"""
+File: common/predation.py
+Description: Predation pressure per country and year. The sightings of all predator
+             species are stacked into one point set and assigned to countries with a
+             single query against an STRtree of the country polygons, for every year at
+             once. The result is a year × country × species count cube, from which a
+             predation score scaled to 0–0.5 is derived per year.
+"""
+
+import numpy as np
+import pandas as pd
+import shapely
+
+# Predation score range, as in the original 2024 score (max impact 0.5)
+SCORE_RANGE = (0.0, 0.5)
+
+# Last year with a full year of predator sightings (the GBIF download ends 2025-05-23)
+LAST_COMPLETE_YEAR = 2024
+
+POINT_COLUMNS = ["eventDate", "decimalLatitude", "decimalLongitude"]
+
+
+def load_predator_points(species_files, years=None):
+    """
+    Stack the sightings of several species into one table (species, year, lon, lat).
+
+    species_files maps a species label to its CSV (eventDate, decimalLatitude,
+    decimalLongitude). Rows without a parseable date or coordinates are dropped; with
+    years given, only those years are kept.
+    """
+    frames = []
+    for species, path in species_files.items():
+        df = pd.read_csv(path, usecols=POINT_COLUMNS)
+        year = pd.to_datetime(df["eventDate"], errors="coerce").dt.year
+        frames.append(pd.DataFrame({
+            "species": species,
+            "year": year,
+            "lon": pd.to_numeric(df["decimalLongitude"], errors="coerce"),
+            "lat": pd.to_numeric(df["decimalLatitude"], errors="coerce"),
+        }))
+    points = pd.concat(frames, ignore_index=True).dropna(subset=["year", "lon", "lat"])
+    points["year"] = points["year"].astype(int)
+    if years is not None:
+        points = points[points["year"].isin(list(years))]
+    return points.reset_index(drop=True)
+
+
+def load_predator_dataset(path, years=None):
+    """
+    Same table as load_predator_points, read from the predator-partitioned Parquet
+    dataset written by gaia_api/predator_ingest.py (species = predator label).
+    """
+    import pyarrow.parquet as pq
+
+    filters = [("year", "in", list(years))] if years is not None else None
+    df = pq.read_table(path, columns=["predator", "year", "decimalLongitude", "decimalLatitude"],
+                       filters=filters, partitioning="hive").to_pandas()
+    points = pd.DataFrame({
+        "species": df["predator"].astype(str),
+        "year": df["year"],
+        "lon": df["decimalLongitude"],
+        "lat": df["decimalLatitude"],
+    }).dropna(subset=["year", "lon", "lat"])
+    points["year"] = points["year"].astype(int)
+    return points.reset_index(drop=True)
+
+
+def country_matches(lon, lat, countries, name_column="country"):
+    """
+    (point index, country name) for every point lying within a country, from one
+    STRtree query. Like gpd.sjoin(predicate="within"), a point within two overlapping
+    polygons matches both.
+    """
+    tree = shapely.STRtree(countries.geometry.to_numpy())
+    point_index, polygon_index = tree.query(shapely.points(lon, lat), predicate="within")
+    return point_index, countries[name_column].to_numpy()[polygon_index]
+
+
+def predator_count_cube(points, countries, name_column="country"):
+    """
+    Sightings per (year, country, species) as a long table with a count column.
+
+    Every combination of the years, the countries with any sighting and the species
+    is present, with count 0 where there were none.
+    """
+    point_index, names = country_matches(points["lon"].to_numpy(), points["lat"].to_numpy(), countries, name_column)
+    located = pd.DataFrame({
+        "year": points["year"].to_numpy()[point_index],
+        "country": names,
+        "species": points["species"].to_numpy()[point_index],
+    })
+    counts = located.groupby(["year", "country", "species"]).size()
+
+    index = pd.MultiIndex.from_product(
+        [sorted(located["year"].unique()), sorted(located["country"].unique()), list(points["species"].unique())],
+        names=["year", "country", "species"],
+    )
+    return counts.reindex(index, fill_value=0).rename("count").reset_index()
+
+
+def predation_scores(cube, feature_range=SCORE_RANGE):
+    """
+    Per-year predation score: the species counts side by side, their sum
+    predator_total, and predation_score, predator_total min-max scaled to feature_range
+    within the year over the countries with sightings that year (0 if all are equal).
+    """
+    wide = cube.pivot_table(index=["year", "country"], columns="species", values="count",
+                            aggfunc="sum", fill_value=0)
+    species = list(cube["species"].unique())
+    wide = wide[species].reset_index()
+    wide.columns.name = None
+    wide["predator_total"] = wide[species].sum(axis=1)
+    wide = wide[wide["predator_total"] > 0].reset_index(drop=True)
+
+    # Same arithmetic as sklearn's MinMaxScaler, fitted per year
+    total = wide.groupby("year")["predator_total"]
+    low, span = total.transform("min"), total.transform("max") - total.transform("min")
+    scale = (feature_range[1] - feature_range[0]) / span.where(span != 0, 1)
+    wide["predation_score"] = wide["predator_total"] * scale + (feature_range[0] - low * scale)
+    return wide
+
+
+def scores_for_years(scores, years, last_year=LAST_COMPLETE_YEAR):
+    """
+    Predation score per (year, country) for the given years, each year using the
+    latest scored year up to it and not after last_year (None: any scored year), so
+    partial years are not carried forward. Years before the first scored year get no
+    rows.
+    """
+    scored_years = np.sort(scores["year"].unique())
+    if last_year is not None:
+        scored_years = scored_years[scored_years <= last_year]
+    frames = []
+    for year in years:
+        earlier = scored_years[scored_years <= year]
+        if len(earlier):
+            rows = scores.loc[scores["year"] == earlier[-1], ["country", "predation_score"]]
+            frames.append(rows.assign(year=year))
+    if not frames:
+        return pd.DataFrame(columns=["year", "country", "predation_score"])
+    return pd.concat(frames, ignore_index=True)[["year", "country", "predation_score"]]
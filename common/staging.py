@@ -0,0 +1,70 @@
+"""
+File: common/staging.py
+Description: Invasion stage rules shared by the historical staging
+             (forecast/AssignInvasionStage.py) and the forecast transitions
+             (forecast/forecast_engine.py). Stages come from hive density (hives per km²)
+             and a vector of thresholds, classified for all rows at once; the
+             no-regression rule is a cumulative maximum per country.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Density at which stage k + 2 starts (stage 1 below the first threshold)
+STAGE_THRESHOLDS = (0.0002, 0.005)
+
+STAGE_LABELS = {1: "Newly Invaded", 2: "Expanding", 3: "Saturated"}
+
+
+def classify_stages(density, thresholds=STAGE_THRESHOLDS):
+    """
+    Stage of each density: 1 + the number of thresholds it reaches, NaN where the
+    density is NaN.
+
+    thresholds is an ascending vector shared by all rows, or an (n rows, n thresholds)
+    array giving each row its own thresholds (e.g. per region).
+    """
+    density = np.asarray(density, dtype=float)
+    thresholds = np.asarray(thresholds, dtype=float)
+    if thresholds.ndim == 1:
+        stage = 1 + np.digitize(density, thresholds)
+    else:
+        with np.errstate(invalid="ignore"):
+            stage = 1 + (density[..., None] >= thresholds).sum(axis=-1)
+    return np.where(np.isnan(density), np.nan, stage)
+
+
+def progress_stages(stage, density, thresholds=STAGE_THRESHOLDS):
+    """
+    One forecast transition: a stage moves up by one when its density reaches the
+    next stage's threshold, and never moves down. NaN stages stay NaN.
+    """
+    stage = np.asarray(stage, dtype=float)
+    with np.errstate(invalid="ignore"):
+        return np.where(classify_stages(density, thresholds) > stage, stage + 1, stage)
+
+
+def lock_stages(df, stage_column="invasion_stage", group_column="country", order_column="year"):
+    """
+    No-regression rule: within each group, in order_column order, a stage is raised to
+    the highest stage reached so far. Rows without a stage keep none and do not reset
+    the maximum. Returns the stages aligned to df's index.
+    """
+    order = df.sort_values(by=[group_column, order_column], kind="stable")
+    locked = order.groupby(group_column, sort=False)[stage_column].cummax()
+    return locked.reindex(df.index)
+
+
+def stage_table(df, thresholds=STAGE_THRESHOLDS, density_column="hive_density", group_column="country",
+                order_column="year"):
+    """
+    Add invasion_stage (from density), final_stage (no regression) and stage_label,
+    with rows sorted by group and order column. Stages are nullable integers (Int64),
+    so they are written as 1, 2, 3 and not 1.0, 2.0, 3.0.
+    """
+    stages = classify_stages(df[density_column].to_numpy(), thresholds)
+    df = df.assign(invasion_stage=pd.array(stages, dtype="Int64"))
+    df = df.sort_values(by=[group_column, order_column], kind="stable")
+    df["final_stage"] = lock_stages(df, "invasion_stage", group_column, order_column)
+    df["stage_label"] = df["final_stage"].map(STAGE_LABELS)
+    return df
@@ -0,0 +1,231 @@
+"""
+File: common/storage.py
+Description: Storage layer for the pipeline intermediates (combined observations, hive
+             tables, densities, forecasts). Each table is written as a typed,
+             year-partitioned Parquet dataset next to its CSV, with dates stored as
+             timestamps. Readers get column projection and predicate pushdown, e.g.
+             only lat/lon/date for year >= 2020, and fall back to the CSV when no
+             up-to-date Parquet copy exists.
+
+Filters use the pyarrow form: a list of (column, op, value) tuples that must all hold,
+with op one of ==, !=, <, <=, >, >=, in, not in.
+"""
+
+import os
+import shutil
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PARTITION_COLUMN = "year"
+
+# Position of each row in the written table, so a partitioned read can restore the order
+ROW_ORDER_COLUMN = "__row_order"
+
+
+def parquet_path(csv_path):
+    """
+    Location of the Parquet dataset that accompanies a CSV intermediate.
+    """
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+def _parse_dates(df, date_columns):
+    for col in date_columns:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    return df
+
+
+def _add_partition_column(df, date_columns):
+    """
+    Observation tables carry no year column; derive it from the first date column.
+    """
+    if PARTITION_COLUMN not in df.columns:
+        source = next((c for c in date_columns if c in df.columns), None)
+        if source is not None:
+            df[PARTITION_COLUMN] = df[source].dt.year.astype("Int64")
+    return df
+
+
+def _partition_columns(table, partition):
+    """
+    partition is True (by year), False, or a list of columns to partition by, in order.
+    """
+    columns = [PARTITION_COLUMN] if partition is True else list(partition or [])
+    return [col for col in columns if col in table.columns] or None
+
+
+def _prepare_table(df, date_columns, first_row=0):
+    table = _add_partition_column(_parse_dates(df.copy(), date_columns), date_columns)
+    for col in table.columns[table.dtypes == object]:
+        if pd.api.types.infer_dtype(table[col], skipna=True).startswith("mixed"):
+            table[col] = table[col].astype("string")  # e.g. free-text columns with stray numbers
+    table[ROW_ORDER_COLUMN] = range(first_row, first_row + len(table))
+    return table
+
+
+def save_intermediate(df, csv_path, date_columns=("eventDate",), partition=True, keep_csv=True):
+    """
+    Write df as CSV (unless keep_csv is False) and as a Parquet dataset partitioned by year,
+    or by the columns listed in partition. The Parquet copy is skipped with a warning when
+    pyarrow is not installed.
+    """
+    if keep_csv:
+        df.to_csv(csv_path, index=False)
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        logger.warning(f"pyarrow not installed; {csv_path} written as CSV only.")
+        return
+
+    table = _prepare_table(df, date_columns)
+    partition_cols = _partition_columns(table, partition)
+
+    # Write next to the target and swap in, so readers never see a half-written dataset
+    target = parquet_path(csv_path)
+    staging = target + ".tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    if partition_cols:
+        table.to_parquet(staging, partition_cols=partition_cols, index=False)
+    else:
+        os.makedirs(staging)
+        table.to_parquet(os.path.join(staging, "part-0.parquet"), index=False)
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(staging, target)
+    logger.info(f"Saved {len(table)} rows to {target}")
+
+
+class IntermediateWriter:
+    """
+    Chunk-by-chunk counterpart of save_intermediate for tables too large to hold in memory.
+    Every write() appends to a staging CSV and adds files to a staging Parquet dataset; both
+    are swapped into place on close(), and dropped if the block raises. Chunks must share
+    columns and dtypes.
+
+        with IntermediateWriter("GAIA_combined/combined_main.csv") as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+    """
+
+    def __init__(self, csv_path, date_columns=("eventDate",), partition=True):
+        self.csv_path = csv_path
+        self.date_columns = date_columns
+        self.partition = partition
+        self.rows = 0
+        self._chunks = 0
+        self._staging = None
+        self._csv_staging = csv_path + ".tmp"
+
+        try:
+            import pyarrow  # noqa: F401
+            self._staging = parquet_path(csv_path) + ".tmp"
+            shutil.rmtree(self._staging, ignore_errors=True)
+            os.makedirs(self._staging)
+        except ImportError:
+            logger.warning(f"pyarrow not installed; {csv_path} written as CSV only.")
+
+    def write(self, df):
+        df.to_csv(self._csv_staging, mode="w" if self._chunks == 0 else "a", header=self._chunks == 0, index=False)
+        if self._staging is not None:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = _prepare_table(df, self.date_columns, first_row=self.rows)
+            partition_cols = _partition_columns(table, self.partition)
+            pq.write_to_dataset(pa.Table.from_pandas(table, preserve_index=False), self._staging,
+                                partition_cols=partition_cols,
+                                basename_template=f"part-{self._chunks}-{{i}}.parquet")
+        self._chunks += 1
+        self.rows += len(df)
+
+    def close(self):
+        if self._chunks and os.path.exists(self._csv_staging):
+            os.replace(self._csv_staging, self.csv_path)
+        if self._staging is None:
+            return
+        target = parquet_path(self.csv_path)
+        if self._chunks == 0:
+            shutil.rmtree(self._staging, ignore_errors=True)  # nothing written; keep the CSV-only state
+        else:
+            shutil.rmtree(target, ignore_errors=True)
+            os.replace(self._staging, target)
+            os.utime(target)  # at least as new as the CSV, so readers pick it
+            logger.info(f"Saved {self.rows} rows to {target}")
+        self._staging = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            # Never publish a partial table
+            if os.path.exists(self._csv_staging):
+                os.remove(self._csv_staging)
+            if self._staging is not None:
+                shutil.rmtree(self._staging, ignore_errors=True)
+                self._staging = None
+        self.close()
+
+
+def _apply_filters(df, filters):
+    ops = {
+        "==": lambda s, v: s == v, "=": lambda s, v: s == v, "!=": lambda s, v: s != v,
+        "<": lambda s, v: s < v, "<=": lambda s, v: s <= v,
+        ">": lambda s, v: s > v, ">=": lambda s, v: s >= v,
+        "in": lambda s, v: s.isin(v), "not in": lambda s, v: ~s.isin(v),
+    }
+    mask = pd.Series(True, index=df.index)
+    for col, op, value in filters:
+        mask &= ops[op](df[col], value).fillna(False).astype(bool)
+    return df[mask]
+
+
+def _read_csv(csv_path, columns, filters, date_columns):
+    needed = None
+    if columns is not None:
+        needed = set(columns) | {col for col, _, _ in filters or []} | set(date_columns)
+    df = pd.read_csv(csv_path, usecols=(lambda c: c in needed) if needed else None)
+    df = _add_partition_column(_parse_dates(df, date_columns), date_columns)
+    if filters:
+        df = _apply_filters(df, filters).reset_index(drop=True)
+    return df[list(columns)] if columns is not None else df
+
+
+def load_intermediate(csv_path, columns=None, filters=None, date_columns=("eventDate",)):
+    """
+    Read an intermediate table, only the given columns and only rows matching filters.
+
+    The Parquet dataset is used when it exists and is at least as new as the CSV; date
+    columns come back as datetimes either way, and rows and columns in the order they
+    were written.
+    """
+    target = parquet_path(csv_path)
+    use_parquet = os.path.isdir(target) and (
+        not os.path.exists(csv_path) or os.path.getmtime(target) >= os.path.getmtime(csv_path)
+    )
+    if not use_parquet:
+        return _read_csv(csv_path, columns, filters, date_columns)
+
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    # Declare the partition type so the year comes back as an integer, not a category
+    partitioning = ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.int64())]), flavor="hive")
+    ordered = ROW_ORDER_COLUMN in ds.dataset(target, format="parquet", partitioning=partitioning).schema.names
+    read_columns = None if columns is None else list(columns) + ([ROW_ORDER_COLUMN] if ordered else [])
+    table = pq.read_table(target, columns=read_columns, filters=filters, partitioning=partitioning)
+    df = table.to_pandas()
+
+    # Partitioned files come back grouped by partition, with the partition column last
+    if ordered:
+        df = df.sort_values(ROW_ORDER_COLUMN, kind="stable").drop(columns=ROW_ORDER_COLUMN).reset_index(drop=True)
+    if columns is not None:
+        return df[list(columns)]
+    written = [c["name"] for c in (table.schema.pandas_metadata or {}).get("columns", [])]
+    order = [col for col in written if col in df.columns]
+    return df[order + [col for col in df.columns if col not in order]]
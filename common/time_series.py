@@ -0,0 +1,80 @@
+"""
+File: common/time_series.py
+Description: Completion of yearly series with gaps (e.g. a country seen in 2015 and again
+             in 2018). All series are laid onto one series × year grid at once; for each
+             missing year the nearest observed years on both sides are found with
+             cumulative max/min over the grid, and the value is filled by the chosen
+             method. Years before a series' first or after its last observation stay
+             missing.
+"""
+
+import numpy as np
+import pandas as pd
+
+# flat_average: mean of the two bounding observations, for every year of the gap
+# linear:       straight line between them
+# log_linear:   constant growth rate between them (linear where either is not positive)
+FILL_METHODS = ("flat_average", "linear", "log_linear")
+
+
+def interpolate_gap(year, prev_year, prev_value, next_year, next_value, method="flat_average"):
+    """
+    Value of a missing year between (prev_year, prev_value) and (next_year, next_value).
+    Works element-wise on arrays.
+    """
+    if method not in FILL_METHODS:
+        raise ValueError(f"Unknown fill method '{method}', expected one of {FILL_METHODS}")
+    if method == "flat_average":
+        return (prev_value + next_value) / 2
+
+    share = (year - prev_year) / (next_year - prev_year)
+    linear = prev_value + (next_value - prev_value) * share
+    if method == "linear":
+        return linear
+
+    positive = (prev_value > 0) & (next_value > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_linear = np.exp(np.log(prev_value) + (np.log(next_value) - np.log(prev_value)) * share)
+    return np.where(positive, log_linear, linear)
+
+
+def fill_year_gaps(df, value_column, group_column="country", year_column="year", method="flat_average"):
+    """
+    Rows for the years missing inside each group's observed range: a table with the
+    group, year and filled value columns. A gap is only filled when the observations
+    on both sides of it have a value; the first row counts where a year repeats. Rows
+    without a group or year are ignored.
+    """
+    present = df.dropna(subset=[group_column, year_column])
+    present = present.drop_duplicates(subset=[group_column, year_column], keep="first")
+    if present.empty:
+        return pd.DataFrame(columns=[group_column, year_column, value_column])
+
+    codes, groups = pd.factorize(present[group_column])
+    years = present[year_column].to_numpy(dtype=int)
+    first_year = years.min()
+    n_years = years.max() - first_year + 1
+
+    # Series × year grid, NaN where a year was not observed
+    values = np.full((len(groups), n_years), np.nan)
+    observed = np.zeros((len(groups), n_years), dtype=bool)
+    values[codes, years - first_year] = pd.to_numeric(present[value_column], errors="coerce").to_numpy(dtype=float)
+    observed[codes, years - first_year] = True
+
+    # Nearest observed column to the left and right of every cell
+    column = np.arange(n_years)
+    prev_col = np.maximum.accumulate(np.where(observed, column, -1), axis=1)
+    next_col = np.minimum.accumulate(np.where(observed, column, n_years)[:, ::-1], axis=1)[:, ::-1]
+
+    rows, cols = np.nonzero(~observed & (prev_col >= 0) & (next_col < n_years))
+    prev, nxt = prev_col[rows, cols], next_col[rows, cols]
+    prev_value, next_value = values[rows, prev], values[rows, nxt]
+    keep = ~np.isnan(prev_value) & ~np.isnan(next_value)
+    rows, cols, prev, nxt = rows[keep], cols[keep], prev[keep], nxt[keep]
+
+    filled = interpolate_gap(cols, prev, prev_value[keep], nxt, next_value[keep], method)
+    return pd.DataFrame({
+        group_column: np.asarray(groups)[rows],
+        year_column: first_year + cols,
+        value_column: filled,
+    })
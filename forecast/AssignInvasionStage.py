@@ -8,8 +8,12 @@ Output: forecasting/data_generated/hive_density_staged.csv
 """
 
 import os
+import sys
 import logging
-import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.staging import STAGE_THRESHOLDS, stage_table
+from common.storage import load_intermediate, save_intermediate
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -19,62 +23,19 @@ logger = logging.getLogger(__name__)
 input_csv_path = "data_generated/hive_density_by_country_year.csv"
 output_csv_path = "data_generated/hive_density_staged.csv"
 
-def classify_stage(density):
-    """
-    Assign invasion stage based on density (updated thresholds).
-    """
-    if pd.isna(density):
-        return None
-    elif density < 0.0002:
-        return 1  # Newly Invaded
-    elif density < 0.005:
-        return 2  # Expanding
-    else:
-        return 3  # Saturated
-
-def enforce_stage_progression(df):
-    """
-    For each country, ensure that invasion stages do not regress over time.
-    A country can only remain the same or move to a higher stage.
-    """
-    df = df.sort_values(by=["country", "year"]).copy()
-    df["final_stage"] = None
-
-    max_stage_so_far = {}
-
-    for idx, row in df.iterrows():
-        country = row["country"]
-        current_stage = row["invasion_stage"]
-
-        if pd.isna(current_stage):
-            df.at[idx, "final_stage"] = None
-            continue
-
-        previous_max = max_stage_so_far.get(country, 1)
-        locked_stage = max(previous_max, current_stage)
-
-        df.at[idx, "final_stage"] = locked_stage
-        max_stage_so_far[country] = locked_stage
-
-    return df
+# Stage thresholds (hives per km²): stage 2 from the first, stage 3 from the second
+stage_thresholds = STAGE_THRESHOLDS
 
 def main():
     try:
-        df = pd.read_csv(input_csv_path)
+        df = load_intermediate(input_csv_path, date_columns=())
         logger.info(f"Loaded hive density data with {len(df)} rows.")
 
-        # Step 1: Assign stage from density
-        df["invasion_stage"] = df["hive_density"].apply(classify_stage)
-
-        # Step 2: Apply no-regression rule
-        staged_df = enforce_stage_progression(df)
-
-        # Optional: add readable labels
-        stage_labels = {1: "Newly Invaded", 2: "Expanding", 3: "Saturated"}
-        staged_df["stage_label"] = staged_df["final_stage"].map(stage_labels)
+        # Assign stage from density, apply the no-regression rule and add readable labels
+        staged_df = stage_table(df, stage_thresholds)
 
         # Save output
-        staged_df.to_csv(output_csv_path, index=False)
+        save_intermediate(staged_df, output_csv_path, date_columns=())
         logger.info(f"Staged invasion data saved to {output_csv_path}")
 
     except Exception as e:
@@ -6,9 +6,13 @@ Output: forecasting/data_generated/hive_density_by_country_year.csv
 """
 
 import os
+import sys
 import logging
 import pandas as pd
-import geopandas as gpd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.country_areas import country_area_table
+from common.storage import load_intermediate, save_intermediate
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -25,7 +29,7 @@ os.makedirs("data_generated", exist_ok=True)
 
 def load_hive_data(csv_path):
     try:
-        df = pd.read_csv(csv_path)
+        df = load_intermediate(csv_path, date_columns=())
         logger.info(f"Loaded hive data from {csv_path} with {len(df)} records.")
         return df
     except Exception as e:
@@ -48,12 +52,9 @@ def aggregate_weighted_hive_counts(df):
 
 def load_country_boundaries(shapefile_path):
     try:
-        gdf = gpd.read_file(shapefile_path)
-        logger.info(f"Loaded country shapefile from {shapefile_path} with {len(gdf)} records.")
-        gdf = gdf.to_crs(epsg=6933)  # Equal-area projection
-        gdf['area_km2'] = gdf['geometry'].area / 1e6
-        logger.info("Computed area in km² after reprojection.")
-        return gdf[['ADMIN', 'area_km2']]
+        area_df = country_area_table(shapefile_path, country_column='ADMIN')  # Equal-area projection, cached
+        logger.info(f"Loaded areas (km²) for {len(area_df)} countries.")
+        return area_df
     except Exception as e:
         logger.error(f"Error loading country boundaries: {e}")
         raise
@@ -81,7 +82,7 @@ def main():
     country_gdf = load_country_boundaries(shapefile_path)
     merged_df = merge_hive_data_and_areas(hive_counts_df, country_gdf)
     density_df = compute_hive_density(merged_df)
-    density_df.to_csv(output_csv_path, index=False)
+    save_intermediate(density_df, output_csv_path, date_columns=())
     logger.info(f"Hive density data saved to {output_csv_path}")
 
 
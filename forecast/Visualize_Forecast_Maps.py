@@ -1,11 +1,17 @@
 import pandas as pd
-import geopandas as gpd
-import matplotlib.pyplot as plt
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.map_rendering import load_mainland_geometry, render_yearly_maps
 
 # === CONFIG ===
 forecast_csv = "forecasting/output/forecast_2026_to_2050.csv"
 shapefile_path = "../preparingHistoricalData/ne_110m_admin_0_countries/ne_110m_admin_0_countries.shp"
+output_folder = "forecasting/output/maps"
+save_maps = False  # True: write one PNG per year to output_folder instead of showing the maps
+if save_maps:
+    os.makedirs(output_folder, exist_ok=True)
 
 # === 1. Load forecast output ===
 df = pd.read_csv(forecast_csv)
@@ -48,56 +54,23 @@ df['country_gis'] = df['country'].map(name_mapping)
 if not os.path.exists(shapefile_path):
     raise FileNotFoundError("🌍 Shapefile not found. Please place it under ../preparingHistoricalData/ne_110m_admin_0_countries/")
 
-world = gpd.read_file(shapefile_path)
-
-# === 3. Filter and clean country geometries ===
-europe = world[world['NAME'].isin(name_mapping.values())]
-europe = europe.explode(index_parts=True).reset_index(drop=True)
-europe['area'] = europe.geometry.area
-europe = europe.sort_values(by=['NAME', 'area'], ascending=[True, False])
-europe = europe.drop_duplicates(subset='NAME', keep='first')
+# === 3. Mainland country geometries (cached next to the shapefile) ===
+europe = load_mainland_geometry(shapefile_path, name_mapping.values())
 
 # === 4. Set color scale for hive density ===
 vmin = 0
 vmax = 0.02  # adjust upper limit for color scaling
 
-# === 5. Plot maps year-by-year ===
-for year in sorted(df['year'].unique()):
-    df_year = df[df['year'] == year]
-    merged = europe.merge(df_year, left_on='NAME', right_on='country_gis', how='left')
-
-    fig, ax = plt.subplots(figsize=(11, 9))
-
-    # Borders
-    merged.boundary.plot(ax=ax, color="grey", linewidth=0.5)
-
-    # Color fill by density
-    merged.plot(
-        ax=ax,
-        column='hive_density',
-        cmap='OrRd',
-        legend=True,
-        edgecolor='0.8',
-        vmin=vmin,
-        vmax=vmax,
-        missing_kwds={"color": "lightgrey", "label": "No data"}
-    )
-
-    # Add text with hive counts
-    for _, row in merged.iterrows():
-        if pd.notna(row['hive_count']) and row['hive_count'] > 0:
-            centroid = row['geometry'].centroid
-            ax.text(
-                centroid.x,
-                centroid.y,
-                f"{int(row['hive_count'])}",
-                fontsize=6,
-                ha='center',
-                va='center',
-                color='black'
-            )
-
-    ax.set_title(f"Forecasted Vespa velutina Hive Density – {year}", fontsize=14)
-    ax.axis('off')
-    plt.tight_layout()
-    plt.show()
+# === 5. Render maps for all years in parallel ===
+render_yearly_maps(
+    df.dropna(subset=['country_gis']), europe,
+    year_column='year',
+    name_column='country_gis',
+    value_column='hive_density',
+    label_column='hive_count',
+    output_path=os.path.join(output_folder, "forecast_map_{year}.png") if save_maps else None,
+    title="Forecasted Vespa velutina Hive Density – {year}",
+    plot_kwargs={"cmap": 'OrRd', "legend": True, "edgecolor": '0.8', "vmin": vmin, "vmax": vmax},
+)
+if save_maps:
+    print(f"✅ Forecast maps saved to: {output_folder}")
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+File: forecast/coupled_simulation.py
+Description: Coupled hornet → predation → bee simulation. Advances the hornet spread,
+             applies the predation scores and advances bee density year by year in
+             memory, replacing the CSV handoffs between forecast_spread_to_2050.py,
+             predator/load_forecast.py and the bee Forecast_last.py scripts. Outputs
+             are written once at the end.
+Output: forecasting/output/coupled/{forecast_2026_to_2050, forecast_with_predation_adjustment,
+        bee_forecast_2026_to_2050}.csv
+"""
+
+import os
+import sys
+import logging
+
+import numpy as np
+import pandas as pd
+
+from country_neighbors import neighbors
+from forecast_engine import (DEFAULT_PARAMS, build_adjacency, build_initial_state, run_forecast,
+                             state_to_frame, forecast_table)
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.bee_projection import (DEFAULT_CORRELATION, DECLINE_CAP, START_YEAR, END_YEAR,
+                                   advance_bee_density, bee_forecast_frame, load_bee_state)
+from common.country_areas import load_country_areas
+from common.predation import LAST_COMPLETE_YEAR, scores_for_years
+from common.storage import load_intermediate, save_intermediate
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# === CONFIG ===
+initial_density_path = "data_generated/hive_density_staged.csv"
+shapefile_path = "../preparingHistoricalData/ne_110m_admin_0_countries/ne_110m_admin_0_countries.shp"
+predation_path = "../predator/output/predation_score_by_year.csv"
+bee_trend_path = "../bees/output/bee_density_trends.csv"
+correlation_path = "../bees/output/correlationByCountry.csv"
+output_folder = "forecasting/output/coupled"
+
+end_year = END_YEAR
+last_score_year = LAST_COMPLETE_YEAR  # predation scores of later (partial) years are not used
+bee_multiplier = 3  # as in bees_predator_hornets/Forecast_last.py
+
+all_countries = list(neighbors.keys())
+
+
+def predation_lookup(predation_df, countries, years, last_year=last_score_year):
+    """
+    Predation score per year as a function year → vector aligned to countries.
+
+    predation_df has 'country' and 'predation_score' columns and optionally 'year'.
+    Without a year column the scores apply to every year; with one, each of the given
+    years uses the latest scored year up to it and not after last_year (see
+    common.predation.scores_for_years). Countries without a score get 0.
+    """
+    position = {country: i for i, country in enumerate(countries)}
+
+    def to_vector(rows):
+        scores = np.zeros(len(countries))
+        for country, score in zip(rows["country"].str.strip(), rows["predation_score"].fillna(0.0)):
+            if country in position:
+                scores[position[country]] = score
+        return scores
+
+    if "year" not in predation_df.columns:
+        scores = to_vector(predation_df)
+        return lambda year: scores
+
+    by_year = {year: to_vector(rows)
+               for year, rows in scores_for_years(predation_df, years, last_year).groupby("year")}
+    unscored = np.zeros(len(countries))
+    return lambda year: by_year.get(year, unscored)
+
+
+def simulate_coupled(state, adjacency, countries, hornet_years, predation, bee_countries, bee_density,
+                     bee_correlation, bee_years, params=DEFAULT_PARAMS, bee_multiplier=bee_multiplier,
+                     decline_cap=DECLINE_CAP):
+    """
+    Advance hornets, predation and bees together, one year at a time.
+
+    predation maps a year to a predation score vector aligned to countries (see
+    predation_lookup). Each hornet year gives the predation-adjusted density
+    hive_density * (1 - predation_score); bees decline on its average with the previous
+    year's (no averaging when the previous year has no hornet forecast), exactly as
+    the CSV chain did.
+
+    Returns (hornet_frames, hornet_density, bee_density): per-year hornet frames with
+    predation_score and adjusted_hive_density columns, and the (bee_years, bee_countries)
+    arrays of adjusted hornet density and bee density.
+    """
+    position = {country: i for i, country in enumerate(countries)}
+    bee_index = np.array([position.get(country, -1) for country in bee_countries], dtype=int)
+    known = bee_index >= 0
+
+    hornet_steps = run_forecast(state, adjacency, hornet_years, params)
+    hornet_year_set = set(hornet_years)
+    bee_year_set = set(bee_years)
+
+    hornet_frames, bee_hornet, bee_out = [], [], []
+    density = np.asarray(bee_density, dtype=float)
+    previous = None
+    for year in range(min(hornet_years[0], bee_years[0]), max(hornet_years[-1], bee_years[-1]) + 1):
+        current = None
+        if year in hornet_year_set:
+            _, state, invaded, sources = next(hornet_steps)
+            for i, source in zip(invaded, sources):
+                logger.info(f"{year}: {countries[source]} → {countries[i]} invaded (stage 2+)")
+
+            frame = state_to_frame(year, state, countries)
+            scores = predation(year)[np.flatnonzero(state["active"])]
+            frame["predation_score"] = scores
+            frame["adjusted_hive_density"] = frame["hive_density"].astype(float) * (1 - scores)
+            hornet_frames.append(frame)
+
+            adjusted = np.zeros(len(countries))
+            adjusted[np.flatnonzero(state["active"])] = frame["adjusted_hive_density"].to_numpy()
+            current = np.where(known, adjusted[bee_index], 0.0)
+
+        if year in bee_year_set:
+            hornet_now = current if current is not None else np.zeros(len(bee_countries))
+            lagged = (hornet_now + previous) / 2 if previous is not None else hornet_now
+            density = advance_bee_density(density, lagged, bee_correlation, bee_multiplier, decline_cap)
+            bee_hornet.append(hornet_now)
+            bee_out.append(density)
+
+        previous = current
+
+    return hornet_frames, np.array(bee_hornet), np.array(bee_out)
+
+
+def main():
+    # === LOAD INPUTS (once) ===
+    initial_df = load_intermediate(initial_density_path, columns=["year", "country", "final_stage", "hive_density"],
+                                   date_columns=())
+    start_year = int(initial_df["year"].max() - 1)
+    initial_df = initial_df[initial_df["year"] == start_year][["country", "final_stage", "hive_density"]]
+    state = build_initial_state(all_countries, initial_df, load_country_areas(shapefile_path))
+    adjacency = build_adjacency(all_countries, neighbors)
+
+    hornet_years = list(range(start_year + 1, end_year + 1))
+    predation = predation_lookup(pd.read_csv(predation_path), all_countries, hornet_years)
+
+    latest_bees, cor_map = load_bee_state(bee_trend_path, correlation_path, START_YEAR)
+    bee_countries = latest_bees["Country"].tolist()
+    bee_correlation = np.array([cor_map.get(country, DEFAULT_CORRELATION) for country in bee_countries])
+
+    # === SIMULATE ===
+    bee_years = list(range(START_YEAR + 1, end_year + 1))
+    logger.info(f"Simulating hornets {hornet_years[0]}–{end_year} and bees {bee_years[0]}–{end_year}...")
+    hornet_frames, bee_hornet, bee_density = simulate_coupled(
+        state, adjacency, all_countries, hornet_years, predation,
+        bee_countries, latest_bees["Bee_Density"].to_numpy(), bee_correlation, bee_years,
+    )
+
+    # === SAVE OUTPUTS ===
+    os.makedirs(output_folder, exist_ok=True)
+    predation_df = forecast_table(hornet_frames, pd.api.types.is_integer_dtype(initial_df["final_stage"]))
+    forecast_df = predation_df.drop(columns=["predation_score", "adjusted_hive_density"])
+    bee_df = bee_forecast_frame(bee_years, bee_countries, bee_hornet, bee_density, latest_bees["Area_km2"].to_numpy())
+
+    outputs = {
+        "forecast_2026_to_2050.csv": forecast_df,
+        "forecast_with_predation_adjustment.csv": predation_df,
+        "bee_forecast_2026_to_2050.csv": bee_df,
+    }
+    for name, df in outputs.items():
+        save_intermediate(df, os.path.join(output_folder, name), date_columns=())
+    logger.info(f"✅ Coupled forecast saved to {output_folder}")
+
+
+if __name__ == "__main__":
+    main()
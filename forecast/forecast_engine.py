@@ -0,0 +1,189 @@
+"""
+File: forecast/forecast_engine.py
+Description: Array-backed forecast engine. Holds stage, stage_year, hive density and
+             area for all countries as NumPy vectors and advances them one year at a time.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.staging import STAGE_THRESHOLDS, progress_stages
+
+# === STAGE TRANSITION THRESHOLDS (hives per km², shared with AssignInvasionStage.py) ===
+STAGE_2_THRESHOLD, STAGE_3_THRESHOLD = STAGE_THRESHOLDS
+
+# Hives placed in a newly invaded country
+SEED_HIVES = 2
+
+# Model parameters of the deterministic forecast
+DEFAULT_PARAMS = {
+    "stage_1_rate": 0.35,
+    "stage_2_increment": 0.0005,
+    "stage_3_increment": 0.0003,
+    "stage_2_threshold": STAGE_2_THRESHOLD,
+    "stage_3_threshold": STAGE_3_THRESHOLD,
+    "seed_hives": SEED_HIVES,
+}
+
+
+# === GROWTH FUNCTIONS ===
+# Written with plain arithmetic so they work on scalars and NumPy arrays alike.
+
+def growth_stage_1(density, year_in_stage, rate=0.35):
+    return density * (1 + rate)
+    # Conservative exponential growth
+
+def growth_stage_2(density, year_in_stage, increment=0.0005):
+    return density + increment * (1 + 1 / (year_in_stage + 1)**0.5)
+    # Accelerated but saturating linear-log growth
+
+def growth_stage_3(density, year_in_stage, increment=0.0003):
+    return density + increment / ((year_in_stage + 1) ** 1.2)
+    # Conservative slow-down
+
+
+def build_adjacency(countries, neighbors):
+    """
+    Compile the country → neighbor-names map into a sparse adjacency matrix.
+
+    Row i holds the neighbors listed for countries[i], in listed order. Neighbors that
+    are not part of the simulated countries are dropped.
+    """
+    position = {country: i for i, country in enumerate(countries)}
+    indptr = [0]
+    indices = []
+    for country in countries:
+        indices.extend(position[n] for n in neighbors.get(country, []) if n in position)
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.int32)
+    n = len(countries)
+    return sparse.csr_matrix((data, np.array(indices, dtype=np.int32), np.array(indptr)), shape=(n, n))
+
+
+def first_listed_neighbor(adjacency, i, mask):
+    """
+    Position of the first neighbor listed for country i whose mask entry is set.
+    """
+    row = adjacency.indices[adjacency.indptr[i]:adjacency.indptr[i + 1]]
+    return row[mask[row]][0]
+
+
+def build_initial_state(countries, initial_df, area_map):
+    """
+    Build the state vectors from the starting year of the staged history.
+
+    initial_df needs 'country', 'final_stage' and 'hive_density' columns; countries
+    missing from it start uninvaded. area_map maps country name → area in km².
+    """
+    n = len(countries)
+    initial = initial_df.drop_duplicates(subset="country").set_index("country")
+
+    state = {
+        "active": np.zeros(n, dtype=bool),
+        "stage": np.full(n, np.nan),
+        "stage_year": np.ones(n, dtype=int),
+        "hive_density": np.full(n, np.nan),
+        "area_km2": np.array([area_map.get(c, np.nan) for c in countries], dtype=float),
+    }
+
+    present = np.array([c in initial.index for c in countries], dtype=bool)
+    rows = initial.reindex([c for c in countries if c in initial.index])
+    state["active"][present] = True
+    state["stage"][present] = rows["final_stage"].to_numpy(dtype=float, na_value=np.nan)
+    state["hive_density"][present] = rows["hive_density"].to_numpy(dtype=float)
+    return state
+
+
+def advance_year(state, adjacency, params=DEFAULT_PARAMS):
+    """
+    Advance every country by one year using the growth constants, thresholds and
+    seed size in params (see DEFAULT_PARAMS).
+
+    Invaded countries grow by their stage's growth function and move up a stage once
+    the new density crosses the threshold. Uninvaded countries with a known area are
+    seeded at stage 1 when any neighbor was at stage 2+ in the previous year.
+
+    Returns the new state, the positions of countries invaded this year and, for each
+    of them, the first listed neighbor that spread into it.
+    """
+    active = state["active"]
+    stage = state["stage"]
+    stage_year = state["stage_year"]
+    density = state["hive_density"]
+    area = state["area_km2"]
+
+    with np.errstate(invalid="ignore"):
+        grown = np.select(
+            [stage == 1, stage == 2],
+            [growth_stage_1(density, stage_year, params["stage_1_rate"]),
+             growth_stage_2(density, stage_year, params["stage_2_increment"])],
+            default=growth_stage_3(density, stage_year, params["stage_3_increment"]),
+        )
+
+    new_stage = progress_stages(stage, grown, (params["stage_2_threshold"], params["stage_3_threshold"]))
+    new_stage_year = np.where(new_stage > stage, 1, stage_year + 1)
+
+    # Cross-border spread: one sparse product counts stage 2+ neighbors per country
+    with np.errstate(invalid="ignore"):
+        spreading = active & (stage >= 2)
+    exposure = adjacency @ spreading.astype(np.int32)
+    invaded = np.flatnonzero(~active & ~np.isnan(area) & (exposure > 0))
+    sources = np.array([first_listed_neighbor(adjacency, i, spreading) for i in invaded], dtype=int)
+
+    new_active = active.copy()
+    new_active[invaded] = True
+    new_stage[invaded] = 1
+    new_stage_year[invaded] = 1
+    grown[invaded] = params["seed_hives"] / area[invaded]
+
+    new_state = {
+        "active": new_active,
+        "stage": np.where(new_active, new_stage, np.nan),
+        "stage_year": np.where(new_active, new_stage_year, 1),
+        "hive_density": np.where(new_active, grown, np.nan),
+        "area_km2": area,
+    }
+    return new_state, invaded, sources
+
+
+def run_forecast(state, adjacency, years, params=DEFAULT_PARAMS):
+    """
+    Run the forecast over the given years. Yields (year, state, invaded, sources) per year.
+    """
+    for year in years:
+        state, invaded, sources = advance_year(state, adjacency, params)
+        yield year, state, invaded, sources
+
+
+def state_to_frame(year, state, countries):
+    """
+    Convert the invaded countries of one forecast year into output rows.
+    """
+    idx = np.flatnonzero(state["active"])
+    dens = np.nan_to_num(state["hive_density"][idx], nan=0.0)
+    area = np.nan_to_num(state["area_km2"][idx], nan=0.0)
+    return pd.DataFrame({
+        "year": year,
+        "country": [countries[i] for i in idx],
+        "stage": state["stage"][idx],
+        "stage_year": state["stage_year"][idx],
+        # Python's round() keeps the 7-decimal output identical to the previous dict loop
+        "hive_density": [round(d, 7) for d in dens.tolist()],
+        "hive_count": np.rint(dens * area).astype(int),
+    })
+
+
+def forecast_table(frames, integer_stage=False):
+    """
+    Concatenate the per-year frames into the forecast output, sorted by year and country.
+    With integer_stage (the staged input had integer stages) stages are written as ints.
+    """
+    df = pd.concat(frames, ignore_index=True)
+    if integer_stage and not df["stage"].isna().any():
+        df["stage"] = df["stage"].astype(int)
+    return df.sort_values(by=["year", "country"])
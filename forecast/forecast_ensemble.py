@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+File: forecast/forecast_ensemble.py
+Description: Monte Carlo ensemble of the 2026–2050 forecast. Samples growth constants,
+             stage thresholds and the invasion seed from configurable distributions,
+             runs the trajectories on a process pool and writes per-year quantiles of
+             hive density and hive count for every country. Finished chunks are stored
+             year-major in a memory-mapped scratch array on disk and reduced one year at
+             a time, so memory holds one year of all trajectories plus the chunks in
+             flight, whatever the number of trajectories.
+Output: forecasting/output/forecast_ensemble_quantiles.csv
+"""
+
+import os
+import sys
+import logging
+import tempfile
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from country_neighbors import neighbors
+from forecast_engine import DEFAULT_PARAMS, build_adjacency, build_initial_state, run_forecast
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.country_areas import load_country_areas
+from common.storage import load_intermediate
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# === CONFIG ===
+initial_density_path = "data_generated/hive_density_staged.csv"
+shapefile_path = "../preparingHistoricalData/ne_110m_admin_0_countries/ne_110m_admin_0_countries.shp"
+output_quantiles_path = "forecasting/output/forecast_ensemble_quantiles.csv"
+
+n_trajectories = 5000
+chunk_size = 250
+n_workers = os.cpu_count()
+random_seed = 42
+quantiles = [0.05, 0.5, 0.95]
+end_year = 2050
+
+# Sampling distribution per parameter:
+#   ("fixed", value), ("normal", mean, sd), ("uniform", low, high),
+#   ("lognormal", median, sigma), ("poisson", mean)
+# Parameters not listed keep their DEFAULT_PARAMS value.
+parameter_distributions = {
+    "stage_1_rate": ("normal", 0.35, 0.05),
+    "stage_2_increment": ("lognormal", 0.0005, 0.2),
+    "stage_3_increment": ("lognormal", 0.0003, 0.2),
+    "stage_2_threshold": ("uniform", 0.00015, 0.00025),
+    "stage_3_threshold": ("uniform", 0.004, 0.006),
+    "seed_hives": ("poisson", 2),
+}
+
+all_countries = list(neighbors.keys())
+
+
+def sample_parameter(rng, spec, size):
+    """
+    Draw `size` values for one parameter from its distribution spec.
+    """
+    kind = spec[0]
+    if kind == "fixed":
+        return np.full(size, spec[1], dtype=float)
+    if kind == "normal":
+        return rng.normal(spec[1], spec[2], size)
+    if kind == "uniform":
+        return rng.uniform(spec[1], spec[2], size)
+    if kind == "lognormal":
+        return rng.lognormal(np.log(spec[1]), spec[2], size)
+    if kind == "poisson":
+        # At least one hive is needed to start an invasion
+        return np.maximum(rng.poisson(spec[1], size), 1).astype(float)
+    raise ValueError(f"Unknown distribution '{kind}' in {spec}")
+
+
+def sample_parameters(rng, distributions, size):
+    """
+    Draw `size` parameter sets as a list of dicts shaped like DEFAULT_PARAMS.
+    """
+    columns = {
+        name: sample_parameter(rng, distributions[name], size) if name in distributions
+        else np.full(size, default, dtype=float)
+        for name, default in DEFAULT_PARAMS.items()
+    }
+    return [{name: values[i] for name, values in columns.items()} for i in range(size)]
+
+
+# State shared with worker processes, set once per worker by init_worker
+_worker_inputs = {}
+
+
+def init_worker(initial_state, adjacency, years):
+    _worker_inputs["initial_state"] = initial_state
+    _worker_inputs["adjacency"] = adjacency
+    _worker_inputs["years"] = years
+
+
+def simulate_chunk(task):
+    """
+    Run one chunk of trajectories. Returns the chunk's offset and its hive density shaped
+    (years, trajectories, countries); uninvaded countries count as zero.
+    """
+    offset, chunk_seed, size, distributions = task
+    rng = np.random.default_rng(chunk_seed)
+    initial_state = _worker_inputs["initial_state"]
+    adjacency = _worker_inputs["adjacency"]
+    years = _worker_inputs["years"]
+
+    n_countries = len(initial_state["active"])
+    density = np.zeros((len(years), size, n_countries))
+
+    for t, params in enumerate(sample_parameters(rng, distributions, size)):
+        for y, (_, state, _, _) in enumerate(run_forecast(initial_state, adjacency, years, params)):
+            density[y, t] = np.where(state["active"], np.nan_to_num(state["hive_density"], nan=0.0), 0.0)
+
+    return offset, density
+
+
+def load_initial_state():
+    initial_df = load_intermediate(initial_density_path, columns=["year", "country", "final_stage", "hive_density"],
+                                   date_columns=())
+    start_year = int(initial_df["year"].max() - 1)
+    initial_df = initial_df[initial_df["year"] == start_year][["country", "final_stage", "hive_density"]]
+    logger.info(f"Loaded starting state for {start_year} with {len(initial_df)} countries.")
+
+    area_map = load_country_areas(shapefile_path)
+    return start_year, build_initial_state(all_countries, initial_df, area_map)
+
+
+def write_quantiles(years, density, area, output_path):
+    """
+    Append one block of quantile rows per year, so the file grows as years are summarised.
+    density is shaped (years, trajectories, countries) and is read one year at a time;
+    hive counts are derived from it with the country areas.
+    """
+    labels = [f"p{round(q * 100)}" for q in quantiles]
+    header = True
+    for y, year in enumerate(years):
+        year_density = np.asarray(density[y])
+        density_q = np.quantile(year_density, quantiles, axis=0)
+        count_q = np.quantile(np.rint(year_density * area), quantiles, axis=0)
+        rows = {"year": year, "country": all_countries}
+        for i, label in enumerate(labels):
+            rows[f"hive_density_{label}"] = density_q[i].round(7)
+        for i, label in enumerate(labels):
+            rows[f"hive_count_{label}"] = count_q[i].round()
+        pd.DataFrame(rows).to_csv(output_path, mode="w" if header else "a", header=header, index=False)
+        header = False
+
+
+def main():
+    os.makedirs(os.path.dirname(output_quantiles_path), exist_ok=True)
+    start_year, initial_state = load_initial_state()
+    adjacency = build_adjacency(all_countries, neighbors)
+    years = list(range(start_year + 1, end_year + 1))
+
+    seeds = np.random.SeedSequence(random_seed).spawn((n_trajectories + chunk_size - 1) // chunk_size)
+    sizes = [min(chunk_size, n_trajectories - i * chunk_size) for i in range(len(seeds))]
+    tasks = [(i * chunk_size, seed, size, parameter_distributions) for i, (seed, size) in enumerate(zip(seeds, sizes))]
+    area = np.nan_to_num(initial_state["area_km2"], nan=0.0)
+
+    logger.info(f"Running {n_trajectories} trajectories in {len(tasks)} chunks on {n_workers} workers...")
+    with tempfile.TemporaryDirectory() as scratch:
+        density = np.lib.format.open_memmap(os.path.join(scratch, "density.npy"), mode="w+", dtype=float,
+                                            shape=(len(years), n_trajectories, len(all_countries)))
+        with Pool(n_workers, initializer=init_worker, initargs=(initial_state, adjacency, years)) as pool:
+            # Each chunk goes to disk as soon as it finishes
+            for offset, chunk in pool.imap_unordered(simulate_chunk, tasks):
+                density[:, offset:offset + chunk.shape[1]] = chunk
+
+        write_quantiles(years, density, area, output_quantiles_path)
+        del density  # release the mapping before the scratch folder is removed
+    logger.info(f"✅ Ensemble quantiles saved to {output_quantiles_path}")
+
+
+if __name__ == "__main__":
+    main()
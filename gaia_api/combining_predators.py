@@ -3,25 +3,9 @@ import geopandas as gpd
 from shapely.geometry import Point
 import matplotlib.pyplot as plt
  
-# === Načítanie CSV súborov + pridanie druhu ako stĺpca ===
-df_pernis = pd.read_csv(r"C:\Users\Adriana Slúková\OneDrive - Vysoké učení technické v Brně\Dokumenty\Pernis_2024-2025.csv")
-df_pernis['species'] = 'Pernis apivorus'
- 
-df_gallus = pd.read_csv(r"C:\Users\Adriana Slúková\OneDrive - Vysoké učení technické v Brně\Dokumenty\Gallus_2024-2025.csv")
-df_gallus['species'] = 'Gallus gallus'
- 
-df_martes = pd.read_csv(r"C:\Users\Adriana Slúková\OneDrive - Vysoké učení technické v Brně\Dokumenty\Martes_2024-2025.csv")
-df_martes['species'] = 'Martes martes'
- 
-# Spojenie všetkých dát
-df_all = pd.concat([df_pernis, df_gallus, df_martes], ignore_index=True)
- 
-# Oprava názvov stĺpcov (ak treba)
-df_all = df_all.rename(columns={
-    'Event date': 'eventDate',
-    'Decimal latitude': 'decimalLatitude',
-    'Decimal longitude': 'decimalLongitude'
-})
+# === Načítanie všetkých predátorov (výstup predator_ingest.py, druh v stĺpci species) ===
+df_all = pd.read_parquet("predator_occurrences.parquet",
+                         columns=['predator', 'species', 'eventDate', 'decimalLatitude', 'decimalLongitude'])
  
 # Vyčistenie dát
 df_all = df_all.dropna(subset=['decimalLatitude', 'decimalLongitude', 'eventDate'])
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+File: gaia_api/gbif_ingest.py
+Description: Python replacement for gathering_data.R. Fetches GBIF occurrences for a
+             species inside a polygon, one date window per task, with the windows fetched
+             concurrently over one pooled HTTP session. A window with more records than
+             max_records is split in two instead of being truncated. Every finished
+             window is checkpointed to a local cache keyed by (species, geometry, date
+             range), so an interrupted run resumes where it stopped.
+Output: vespa_velutina_gbif_2010-2024.csv (+ year-partitioned Parquet copy)
+
+Records keep their GBIF column names plus gbifID, the GBIF occurrence key. The output
+file has the columns of the R script's file, with the coordinates renamed to
+latitude/longitude as it did, plus gbifID in front. base_url can point to a local
+stand-in for the occurrence search API (GET {base_url}/occurrence/search).
+"""
+
+import os
+import sys
+import json
+import hashlib
+import logging
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import pandas as pd
+import requests
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.http_session import pooled_session
+from common.storage import save_intermediate
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+GBIF_API = "https://api.gbif.org/v1"
+PAGE_SIZE = 300  # largest page the occurrence search returns
+CACHE_VERSION = 1
+
+# === CONFIG (as in gathering_data.R) ===
+species = "Vespa velutina"
+geometry = (
+    "POLYGON ((10.537296 58.170702, 4.738046 56.704506, -4.839504 50.569283, -7.03619 48.04871, "
+    "-2.818553 44.402392, -10.375153 44.402392, -11.956766 39.504041, -9.496478 35.603719, "
+    "-3.082156 35.960223, 3.507902 37.996163, 9.658622 38.479395, 14.403463 39.368279, "
+    "17.742426 44.024422, 19.851244 47.754098, 16.424414 54.007769, 10.537296 58.170702))"
+)
+start_date = date(2010, 1, 1)
+end_date = date(2024, 12, 31)
+max_records = 10000  # per window; larger windows are split (dailyLimit in the R script)
+n_workers = 8
+cache_dir = "gbif_cache"
+output_csv = "vespa_velutina_gbif_2010-2024.csv"
+output_names = {"decimalLatitude": "latitude", "decimalLongitude": "longitude"}  # as in gathering_data.R
+
+# Output columns and their types; missing fields stay empty
+COLUMN_TYPES = {
+    "gbifID": "Int64",
+    "eventDate": "datetime64[ns]",
+    "dateIdentified": "datetime64[ns]",
+    "decimalLatitude": "float64",
+    "decimalLongitude": "float64",
+    "kingdom": "string",
+    "class": "string",
+    "family": "string",
+    "genus": "string",
+    "species": "string",
+    "license": "string",
+    "behavior": "string",
+    "coordinateUncertaintyInMeters": "float64",
+}
+
+
+def quarter_windows(start, end):
+    """
+    Calendar quarters covering start..end as inclusive (first day, last day) pairs.
+    """
+    windows = []
+    first = date(start.year, 3 * ((start.month - 1) // 3) + 1, 1)
+    while first <= end:
+        month = first.month + 3
+        following = date(first.year + (month > 12), (month - 1) % 12 + 1, 1)
+        windows.append((max(first, start), min(following - timedelta(days=1), end)))
+        first = following
+    return windows
+
+
+def split_window(window):
+    """
+    Halve an inclusive date window; a single day cannot be split and returns None.
+    """
+    start, end = window
+    if start >= end:
+        return None
+    middle = start + (end - start) // 2
+    return [(start, middle), (middle + timedelta(days=1), end)]
+
+
+def search_page(session, base_url, species, geometry, window, offset, limit, timeout=60):
+    params = {
+        "scientificName": species,
+        "hasCoordinate": "true",
+        "geometry": geometry,
+        "eventDate": f"{window[0].isoformat()},{window[1].isoformat()}",
+        "offset": offset,
+        "limit": limit,
+    }
+    response = session.get(f"{base_url}/occurrence/search", params=params, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def records_frame(records):
+    """
+    Typed table from GBIF occurrence records. Dates keep their day: GBIF gives times and
+    time zones inconsistently, and date ranges (e.g. '2019-08/2019-09') become empty.
+    """
+    rows = [{**record, "gbifID": record.get("key")} for record in records]
+    df = pd.DataFrame(rows, columns=list(COLUMN_TYPES)) if rows else pd.DataFrame(columns=list(COLUMN_TYPES))
+    for col, dtype in COLUMN_TYPES.items():
+        if dtype.startswith("datetime"):
+            dates = pd.to_datetime(df[col].astype("string").str.slice(0, 10), format="%Y-%m-%d", errors="coerce")
+            df[col] = dates.astype(dtype)
+        else:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+class WindowCache:
+    """
+    Finished windows on disk: <key>.json holds the window's metadata and marks it done;
+    its records are in <key>.parquet, or the json lists the halves it was split into.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(species, geometry, window):
+        payload = json.dumps({"version": CACHE_VERSION, "species": species, "geometry": geometry,
+                              "start": window[0].isoformat(), "end": window[1].isoformat()}, sort_keys=True)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key, ext):
+        return os.path.join(self.directory, key + ext)
+
+    def get(self, key):
+        try:
+            with open(self._path(key, ".json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def records(self, key):
+        return pd.read_parquet(self._path(key, ".parquet"))
+
+    def put(self, key, meta, records=None):
+        # Records first, then the json, so a window is only marked done once complete
+        if records is not None:
+            records.to_parquet(self._path(key, ".parquet.tmp"), index=False)
+            os.replace(self._path(key, ".parquet.tmp"), self._path(key, ".parquet"))
+        with open(self._path(key, ".json.tmp"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(self._path(key, ".json.tmp"), self._path(key, ".json"))
+
+
+def fetch_window(session, base_url, species, geometry, window, max_records):
+    """
+    Fetch one window. Returns (halves, None) when the window has more than max_records
+    records and can be split, otherwise (None, records).
+    """
+    count = search_page(session, base_url, species, geometry, window, 0, 0)["count"]
+    halves = split_window(window) if count > max_records else None
+    if halves:
+        logger.info(f"{species} {window[0]}–{window[1]}: {count} records, splitting")
+        return halves, None
+    if count > max_records:
+        logger.warning(f"{species} {window[0]}: {count} records on a single day, keeping the first {max_records}")
+
+    records, offset = [], 0
+    while offset < min(count, max_records):
+        page = search_page(session, base_url, species, geometry, window, offset,
+                           min(PAGE_SIZE, max_records - offset))
+        records.extend(page["results"])
+        offset += len(page["results"])
+        if page.get("endOfRecords", True) or not page["results"]:
+            break
+    logger.info(f"{species} {window[0]}–{window[1]}: {len(records)} records")
+    return None, records_frame(records)
+
+
+def fetch_species_occurrences(species_list, geometry, windows, cache_dir, base_url=GBIF_API,
+                              max_records=max_records, n_workers=n_workers, session=None):
+    """
+    Fetch every (species, window) pair concurrently, resuming from the cache. Returns
+    {species: records in window order without duplicate occurrences}.
+
+    A failed window does not stop the others; they are all checkpointed before the
+    failure is raised, so the next run only fetches what is missing.
+    """
+    cache = WindowCache(cache_dir)
+    session = session or pooled_session(n_workers)
+    done = {}  # (species, window) -> records
+    failed = []
+    resumed = 0
+
+    def expand(task):
+        # Tasks still to fetch under this one, following cached splits
+        species, window = task
+        meta = cache.get(WindowCache.key(species, geometry, window))
+        if meta is None:
+            return [task]
+        if meta.get("split"):
+            return [t for half in meta["split"]
+                    for t in expand((species, (date.fromisoformat(half[0]), date.fromisoformat(half[1]))))]
+        nonlocal resumed
+        resumed += 1
+        done[task] = cache.records(WindowCache.key(species, geometry, window))
+        return []
+
+    pending = [t for species in species_list for window in windows for t in expand((species, window))]
+    if resumed:
+        logger.info(f"Resumed {resumed} windows from {cache_dir}")
+
+    with ThreadPoolExecutor(max_workers=n_workers) as pool:
+        def submit(task):
+            running[pool.submit(fetch_window, session, base_url, task[0], geometry, task[1], max_records)] = task
+
+        running = {}
+        for task in pending:
+            submit(task)
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                task = running.pop(future)
+                species, window = task
+                try:
+                    halves, records = future.result()
+                except requests.RequestException as e:
+                    logger.error(f"{species} {window[0]}–{window[1]}: {e}")
+                    failed.append(task)
+                    continue
+                key = WindowCache.key(species, geometry, window)
+                meta = {"species": species, "start": window[0].isoformat(), "end": window[1].isoformat()}
+                if halves:
+                    cache.put(key, {**meta, "split": [[h[0].isoformat(), h[1].isoformat()] for h in halves]})
+                    for half in halves:
+                        submit((species, half))
+                else:
+                    cache.put(key, {**meta, "rows": len(records)}, records)
+                    done[task] = records
+
+    if failed:
+        raise RuntimeError(f"{len(failed)} windows failed; run again to fetch them (finished windows are cached)")
+
+    result = {}
+    for species in species_list:
+        frames = [done[task] for task in sorted(t for t in done if t[0] == species) if len(done[task])]
+        df = pd.concat(frames, ignore_index=True) if frames else records_frame([])
+        result[species] = drop_duplicate_occurrences(df)
+    return result
+
+
+def drop_duplicate_occurrences(df):
+    """
+    Keep the first record of every GBIF occurrence key; records without a key are all kept.
+    """
+    return df[df["gbifID"].isna() | ~df.duplicated(subset="gbifID")].reset_index(drop=True)
+
+
+def fetch_occurrences(species, geometry, windows, cache_dir, base_url=GBIF_API, max_records=max_records,
+                      n_workers=n_workers, session=None):
+    """
+    Records of one species over all windows (see fetch_species_occurrences).
+    """
+    return fetch_species_occurrences([species], geometry, windows, cache_dir, base_url, max_records,
+                                     n_workers, session)[species]
+
+
+def main():
+    windows = quarter_windows(start_date, end_date)
+    logger.info(f"Fetching {species} for {len(windows)} quarters on {n_workers} connections...")
+    df = fetch_occurrences(species, geometry, windows, cache_dir)
+
+    df = df.dropna(subset=["eventDate"]).sort_values("eventDate", kind="stable").reset_index(drop=True)
+    save_intermediate(df.rename(columns=output_names), output_csv)
+    logger.info(f"✅ {len(df)} occurrences saved to {output_csv}")
+
+
+if __name__ == "__main__":
+    main()
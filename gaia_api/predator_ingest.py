@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+File: gaia_api/predator_ingest.py
+Description: Batch replacement for finding_predators.R. Fetches GBIF occurrences of all
+             hornet predators for a date range in one job: every species and quarter is
+             fetched concurrently with the resumable window fetcher of gbif_ingest.py,
+             records are deduplicated on the GBIF occurrence key and written as one typed
+             Parquet dataset partitioned by predator.
+Output: predator_occurrences.parquet/predator=<label>/ (read by predator/sum_pred.py and
+        combining_predators.py)
+"""
+
+import os
+import sys
+import logging
+from datetime import date
+
+import pandas as pd
+
+from gbif_ingest import drop_duplicate_occurrences, fetch_species_occurrences, quarter_windows
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.storage import parquet_path, save_intermediate
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# === CONFIG (as in finding_predators.R) ===
+# Partition label -> GBIF scientific name
+predators = {
+    "Gallus": "Gallus gallus",
+    "Martes": "Martes martes",
+    "Pernis": "Pernis apivorus",
+}
+geometry = (
+    "POLYGON ((32.913569 70.959697, 25.880466 71.691293, 14.100019 70.199994, 6.539434 65.366837, "
+    "2.319572 61.185625, -6.999289 59.534318, -12.977427 52.696361, -2.779427 45.58329, "
+    "-11.922461 43.961191, -9.988358 36.879621, -2.779427 36.031332, 5.660296 38.272689, "
+    "11.286778 38.548165, 16.91326 34.885931, 30.451983 43.325178, 22.71557 53.852527, "
+    "29.572845 57.04073, 30.451983 69.900118, 32.913569 70.959697))"
+)
+start_date = date(2024, 1, 1)
+end_date = date(2025, 5, 23)
+n_workers = 8
+cache_dir = "gbif_cache"
+output_csv = "predator_occurrences.csv"  # only its Parquet dataset is written
+
+
+def ingest_predators(predators, geometry, start, end, cache_dir=cache_dir, n_workers=n_workers, **kwargs):
+    """
+    One table of all predators' occurrences with a predator label column, without
+    duplicate occurrence keys and without records lacking a date.
+    """
+    windows = quarter_windows(start, end)
+    logger.info(f"Fetching {len(predators)} species × {len(windows)} quarters on {n_workers} connections...")
+    by_species = fetch_species_occurrences(list(predators.values()), geometry, windows, cache_dir,
+                                           n_workers=n_workers, **kwargs)
+
+    frames = [by_species[name].assign(predator=label) for label, name in predators.items()]
+    df = drop_duplicate_occurrences(pd.concat(frames, ignore_index=True))
+    df = df.dropna(subset=["eventDate"]).sort_values(["predator", "eventDate"], kind="stable")
+    return df.reset_index(drop=True)
+
+
+def main():
+    df = ingest_predators(predators, geometry, start_date, end_date)
+    save_intermediate(df, output_csv, partition=("predator",), keep_csv=False)
+    for label, count in df["predator"].value_counts().sort_index().items():
+        logger.info(f"{label}: {count} occurrences")
+    logger.info(f"✅ Saved to {parquet_path(output_csv)}")
+
+
+if __name__ == "__main__":
+    main()
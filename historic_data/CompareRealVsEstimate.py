@@ -1,25 +1,20 @@
+import os
+import sys
 import pandas as pd
 #1.4
 
-# Step 1: Load estimated hives
-hives = pd.read_csv("estimated_hives_summary.csv")
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.country_lookup import assign_countries
+from common.storage import load_intermediate
 
-# Step 2: Assign countries using lat/lon bounding boxes
-country_bounds = {
-    'France':      {'lat_min': 41.3, 'lat_max': 51.1, 'lon_min': -5.3, 'lon_max': 9.6},
-    'Spain':       {'lat_min': 36.0, 'lat_max': 43.8, 'lon_min': -9.3, 'lon_max': 3.3},
-    'Portugal':    {'lat_min': 36.8, 'lat_max': 42.1, 'lon_min': -9.5, 'lon_max': -6.2},
-    'Belgium':     {'lat_min': 49.5, 'lat_max': 51.5, 'lon_min': 2.5, 'lon_max': 6.4},
-    'Netherlands': {'lat_min': 50.7, 'lat_max': 53.7, 'lon_min': 3.3, 'lon_max': 7.2}
-}
+shapefile_path = "ne_110m_admin_0_countries/ne_110m_admin_0_countries.shp"
 
-def get_country(lat, lon):
-    for country, bounds in country_bounds.items():
-        if bounds['lat_min'] <= lat <= bounds['lat_max'] and bounds['lon_min'] <= lon <= bounds['lon_max']:
-            return country
-    return None
+# Step 1: Load estimated hives
+hives = load_intermediate("estimated_hives_summary.csv", columns=['year', 'centroid_lat', 'centroid_lon'],
+                          date_columns=())
 
-hives['country'] = hives.apply(lambda row: get_country(row['centroid_lat'], row['centroid_lon']), axis=1)
+# Step 2: Assign countries from the country polygons (batched spatial-index lookup)
+hives['country'] = assign_countries(hives['centroid_lat'], hives['centroid_lon'], shapefile_path)
 hives = hives.dropna(subset=['country'])
 
 # Step 3: Count estimated hives by year and country
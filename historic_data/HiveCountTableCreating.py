@@ -1,19 +1,31 @@
+import os
+import sys
+import json
+import hashlib
 import pandas as pd
 import numpy as np
 from sklearn.cluster import DBSCAN
-from geopy.distance import great_circle
 from datetime import datetime
 #1.2.1
 
-# Load your data
-file_main = 'GAIA_combined/combined_main.csv'
-file_old = 'GAIA_combined/combined_old format_to_2009.csv'
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.grid_clustering import grid_cluster
+from common.storage import load_intermediate, save_intermediate
+
+# Per-year hive tables, reused while a year's observations are unchanged
+cache_dir = 'estimated_hives_by_year'
+manifest_path = os.path.join(cache_dir, 'manifest.json')
+# Part of every year's cache key: bump whenever cluster_year or its summary changes
+cluster_version = 2
+hive_columns = ['hive_id', 'year', 'season_range', 'n_observations', 'centroid_lat', 'centroid_lon',
+                'min_date', 'max_date', 'radius_km', 'notes']
 
-df_main = pd.read_csv(file_main)
-df_old = pd.read_csv(file_old)
+# Load your data (every GAIA export format, combined by combine_cvs.py)
+file_main = 'GAIA_combined/combined_main.csv'
 
-# Combine datasets
-df = pd.concat([df_main, df_old], ignore_index=True)
+# Only the columns used for clustering (Parquet copies are read when available)
+observation_columns = ['eventDate', 'decimalLatitude', 'decimalLongitude']
+df = load_intermediate(file_main, columns=observation_columns)
 
 # Parse dates
 df['eventDate'] = pd.to_datetime(df['eventDate'], errors='coerce')
@@ -28,59 +40,101 @@ df['month'] = df['eventDate'].dt.month
 # Only include active Vespa velutina season (March–November)
 df = df[df['month'].between(3, 11)]
 
-# Clustering function
-def cluster_hives(df, eps_km=2, min_samples=1):
-    hive_records = []
+# Great-circle distance in km, element-wise over arrays (same radius as geopy's great_circle)
+def haversine_km(lat1, lon1, lat2, lon2, radius_km=6371.009):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * radius_km * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+# Clustering for one season
+def cluster_year(df_year, year, eps_km=2, min_samples=1):
     kms_per_radian = 6371.0088  # Earth radius
 
-    for year in sorted(df['year'].unique()):
-        df_year = df[df['year'] == year].copy()
+    df_year = df_year.copy()
 
-        # Coordinates in radians for haversine
-        coords = df_year[['decimalLatitude', 'decimalLongitude']].to_numpy()
-        coords_rad = np.radians(coords)
+    coords = df_year[['decimalLatitude', 'decimalLongitude']].to_numpy()
 
-        # DBSCAN spatial clustering
+    if min_samples == 1:
+        # Connected components within eps: same labels as DBSCAN, near-linear time
+        labels = grid_cluster(coords[:, 0], coords[:, 1], eps_km, earth_radius_km=kms_per_radian)
+    else:
+        # DBSCAN spatial clustering on coordinates in radians for haversine
         db = DBSCAN(eps=eps_km / kms_per_radian, min_samples=min_samples, algorithm='ball_tree', metric='haversine')
-        labels = db.fit_predict(coords_rad)
-
-        df_year['cluster'] = labels
-
-        for cluster_id in sorted(df_year['cluster'].unique()):
-            if cluster_id == -1:
-                continue  # Ignore noise points
-
-            cluster_df = df_year[df_year['cluster'] == cluster_id]
-
-            centroid_lat = cluster_df['decimalLatitude'].mean()
-            centroid_lon = cluster_df['decimalLongitude'].mean()
-            min_date = cluster_df['eventDate'].min().date()
-            max_date = cluster_df['eventDate'].max().date()
-            n_obs = len(cluster_df)
-
-            # Max distance from centroid
-            radius = max(
-                great_circle((centroid_lat, centroid_lon), (row['decimalLatitude'], row['decimalLongitude'])).km
-                for _, row in cluster_df.iterrows()
-            )
-
-            hive_records.append({
-                'hive_id': f'HIVE_{year}_{cluster_id}',
-                'year': year,
-                'season_range': f'{year}-03 to {year}-11',
-                'n_observations': n_obs,
-                'centroid_lat': round(centroid_lat, 5),
-                'centroid_lon': round(centroid_lon, 5),
-                'min_date': min_date,
-                'max_date': max_date,
-                'radius_km': round(radius, 2),
-                'notes': 'only one observation' if n_obs == 1 else ''
-            })
-
-    return pd.DataFrame(hive_records)
+        labels = db.fit_predict(np.radians(coords))
+
+    df_year['cluster'] = labels
+    df_year = df_year[df_year['cluster'] != -1]  # Ignore noise points
+
+    # Per-cluster summary in one grouped pass
+    grouped = df_year.groupby('cluster', sort=True)
+    summary = grouped.agg(
+        centroid_lat=('decimalLatitude', 'mean'),
+        centroid_lon=('decimalLongitude', 'mean'),
+        min_date=('eventDate', 'min'),
+        max_date=('eventDate', 'max'),
+        n_observations=('eventDate', 'size'),
+    )
+
+    # Max distance from centroid
+    distances = haversine_km(
+        df_year['decimalLatitude'].to_numpy(),
+        df_year['decimalLongitude'].to_numpy(),
+        summary['centroid_lat'].reindex(df_year['cluster']).to_numpy(),
+        summary['centroid_lon'].reindex(df_year['cluster']).to_numpy(),
+    )
+    summary['radius_km'] = pd.Series(distances, index=df_year.index).groupby(df_year['cluster']).max()
+
+    return pd.DataFrame({
+        'hive_id': 'HIVE_' + str(year) + '_' + summary.index.astype(str),
+        'year': year,
+        'season_range': f'{year}-03 to {year}-11',
+        'n_observations': summary['n_observations'].to_numpy(),
+        'centroid_lat': summary['centroid_lat'].round(5).to_numpy(),
+        'centroid_lon': summary['centroid_lon'].round(5).to_numpy(),
+        'min_date': summary['min_date'].dt.date.to_numpy(),
+        'max_date': summary['max_date'].dt.date.to_numpy(),
+        'radius_km': summary['radius_km'].round(2).to_numpy(),
+        'notes': np.where(summary['n_observations'] == 1, 'only one observation', ''),
+    }, columns=hive_columns)
+
+# Content hash of the rows that feed one season's clustering
+def year_fingerprint(df_year, eps_km, min_samples):
+    rows = df_year[['eventDate', 'decimalLatitude', 'decimalLongitude']].astype({'eventDate': 'datetime64[ns]'})
+    digest = hashlib.sha1(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes())
+    digest.update(f'{cluster_version}|{eps_km}|{min_samples}'.encode())
+    return digest.hexdigest()
+
+# Clustering function: re-clusters only the years whose observations changed
+def cluster_hives(df, eps_km=2, min_samples=1):
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    year_tables = []
+    for year in sorted(df['year'].unique()):
+        df_year = df[df['year'] == year]
+        fingerprint = year_fingerprint(df_year, eps_km, min_samples)
+        year_path = os.path.join(cache_dir, f'hives_{year}.csv')
+
+        if manifest.get(str(year)) == fingerprint and os.path.exists(year_path):
+            year_tables.append(pd.read_csv(year_path, float_precision='round_trip'))
+            continue
+
+        print(f"Clustering {year} ({len(df_year)} observations)...")
+        hives_year = cluster_year(df_year, year, eps_km, min_samples)
+        hives_year.to_csv(year_path, index=False)
+        manifest[str(year)] = fingerprint
+        year_tables.append(hives_year)
+
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+
+    return pd.concat(year_tables, ignore_index=True)
 
 # Run clustering and export results
 hives_df = cluster_hives(df)
-hives_df.to_csv('estimated_hives_summary.csv', index=False)
+save_intermediate(hives_df, 'estimated_hives_summary.csv', date_columns=('min_date', 'max_date'))
 
 print("✅ Hive estimation complete. Output saved as 'estimated_hives_summary.csv'")
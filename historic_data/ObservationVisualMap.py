@@ -1,15 +1,17 @@
+import os
+import sys
 import pandas as pd
 import geopandas as gpd
 from shapely.geometry import Point
 import matplotlib.pyplot as plt
 #1.1
 
-# Load original files
-df_main = pd.read_csv('GAIA_combined/combined_main.csv')
-df_old = pd.read_csv('GAIA_combined/combined_old format_to_2009.csv')
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.storage import load_intermediate
 
-# Combine both datasets
-df = pd.concat([df_main, df_old], ignore_index=True)
+# Load the combined observations, every export format (only the columns needed for the maps)
+observation_columns = ['eventDate', 'decimalLatitude', 'decimalLongitude']
+df = load_intermediate('GAIA_combined/combined_main.csv', columns=observation_columns)
 
 # Drop rows with missing coordinates or date
 df = df.dropna(subset=['decimalLatitude', 'decimalLongitude', 'eventDate'])
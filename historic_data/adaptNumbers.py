@@ -4,20 +4,29 @@ File: preparingHistoricalData/adaptNumbers.py
 Description:
 1. Inject assumed nest counts for Portugal and Spain.
 2. Add official historical counts from Vlasta where missing.
-3. Fill gaps in time series for countries with re-appearances using average estimation.
+3. Fill gaps in time series for countries with re-appearances (flat average by default,
+   or linear / log-linear interpolation).
 Output: Updates estimated_hives_weighted_output_clamped.csv
 """
 
 import os
+import sys
 import pandas as pd
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.storage import load_intermediate, save_intermediate
+from common.time_series import fill_year_gaps
+
 # Paths
 input_csv = "estimated_hives_weighted_output_clamped.csv"
 output_csv = "estimated_hives_weighted_output_clamped.csv"
 vlasta_csv = "vlasta/yearly_country_nest_summary.csv"
 
+# Gap filling: "flat_average", "linear" or "log_linear" (see common/time_series.py)
+fill_method = "flat_average"
+
 # Load original table
-df = pd.read_csv(input_csv)
+df = load_intermediate(input_csv, date_columns=())
 
 # -------------------------
 # 1. Manual Portugal & Spain injection
@@ -37,77 +46,49 @@ manual_entries = [
     {"year": 2010, "country": "Spain", "count": 10},
 ]
 
-manual_df = pd.DataFrame([
-    {
-        "year": entry["year"],
-        "country": entry["country"],
-        "estimated_hives_without_weighting": entry["count"],
-        "final_weight": 1.0,
-        "estimated_hives_with_weighting": entry["count"],
-        "official_nest_count": entry["count"]
-    }
-    for entry in manual_entries
-])
+manual_df = pd.DataFrame(manual_entries).rename(columns={"count": "estimated_hives_without_weighting"})
+manual_df["final_weight"] = 1.0
+manual_df["estimated_hives_with_weighting"] = manual_df["estimated_hives_without_weighting"]
+manual_df["official_nest_count"] = manual_df["estimated_hives_without_weighting"]
 
-df = df[~df.set_index(["year", "country"]).index.isin(manual_df.set_index(["year", "country"]).index)]
+# Manual entries replace any estimate for the same (year, country)
+keys = ["year", "country"]
+df = df.set_index(keys, drop=False).drop(index=manual_df.set_index(keys).index, errors="ignore").reset_index(drop=True)
 df = pd.concat([df, manual_df], ignore_index=True)
 
 # -------------------------
 # 2. Inject missing historical records from Vlasta
 vlasta_df = pd.read_csv(vlasta_csv).rename(columns={"amount_of_nests": "count"})
 
-existing_index = df.set_index(["year", "country"]).index
-missing_vlasta = vlasta_df[~vlasta_df.set_index(["year", "country"]).index.isin(existing_index)]
+missing_vlasta = vlasta_df.merge(df[keys].drop_duplicates(), on=keys, how="left", indicator=True)
+missing_vlasta = missing_vlasta[missing_vlasta["_merge"] == "left_only"]
 
-vlasta_entries = pd.DataFrame([
-    {
-        "year": row["year"],
-        "country": row["country"],
-        "estimated_hives_without_weighting": row["count"],
-        "final_weight": pd.NA,
-        "estimated_hives_with_weighting": row["count"],
-        "official_nest_count": pd.NA
-    }
-    for _, row in missing_vlasta.iterrows()
-])
+vlasta_entries = pd.DataFrame({
+    "year": missing_vlasta["year"].to_numpy(),
+    "country": missing_vlasta["country"].to_numpy(),
+    "estimated_hives_without_weighting": missing_vlasta["count"].to_numpy(),
+    "final_weight": pd.NA,
+    "estimated_hives_with_weighting": missing_vlasta["count"].to_numpy(),
+    "official_nest_count": pd.NA,
+})
 
-df = pd.concat([df, vlasta_entries], ignore_index=True)
+if not vlasta_entries.empty:
+    df = pd.concat([df, vlasta_entries], ignore_index=True)
 
 # -------------------------
-# 3. Fill year gaps with average estimations
-df = df.sort_values(by=["country", "year"])
-filled_rows = []
-
-for country, group in df.groupby("country"):
-    group_sorted = group.sort_values("year")
-    years = group_sorted["year"].tolist()
-
-    for i in range(len(years) - 1):
-        y1 = years[i]
-        y2 = years[i + 1]
-
-        if y2 - y1 > 1:
-            val1 = group_sorted[group_sorted["year"] == y1]["estimated_hives_with_weighting"].values[0]
-            val2 = group_sorted[group_sorted["year"] == y2]["estimated_hives_with_weighting"].values[0]
-
-            if pd.notna(val1) and pd.notna(val2):
-                for missing_year in range(y1 + 1, y2):
-                    avg_val = (val1 + val2) / 2
-                    filled_rows.append({
-                        "year": missing_year,
-                        "country": country,
-                        "estimated_hives_without_weighting": avg_val,
-                        "final_weight": pd.NA,
-                        "estimated_hives_with_weighting": avg_val,
-                        "official_nest_count": pd.NA
-                    })
+# 3. Fill year gaps of every country in one pass over a country × year grid
+filled = fill_year_gaps(df, "estimated_hives_with_weighting", method=fill_method)
+filled["estimated_hives_without_weighting"] = filled["estimated_hives_with_weighting"]
+filled["final_weight"] = pd.NA
+filled["official_nest_count"] = pd.NA
 
 # Append filled rows
-if filled_rows:
-    df = pd.concat([df, pd.DataFrame(filled_rows)], ignore_index=True)
+if not filled.empty:
+    df = pd.concat([df, filled[["year", "country", "estimated_hives_without_weighting", "final_weight",
+                                "estimated_hives_with_weighting", "official_nest_count"]]], ignore_index=True)
 
 # -------------------------
 # Final sorting and saving
 df = df.sort_values(by=["country", "year"])
-df.to_csv(output_csv, index=False)
+save_intermediate(df, output_csv, date_columns=())
 print(f"✅ Updated file saved to: {output_csv}")
@@ -1,122 +1,159 @@
 import os
+import sys
 import pandas as pd
 import glob
 from pathlib import Path
 
-def find_and_combine_csvs(directory="GAIA"):
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.storage import IntermediateWriter
+
+# Rows read per file at a time; bounds memory to one chunk regardless of export size
+CHUNK_SIZE = 200_000
+
+# Unified schema of the combined file: column -> declared dtype, in output order.
+# eventDate stays text here, as exported; its Parquet copy stores it as a timestamp.
+SCHEMA = {
+    "occurrenceID": "string",
+    "scientificName": "string",
+    "eventDate": "string",
+    "decimalLatitude": "float64",
+    "decimalLongitude": "float64",
+    "coordinateUncertaintyInMeters": "float64",
+    "individualCount": "Int64",
+    "countryCode": "string",
+    "locality": "string",
+    "behavior": "string",
+    "occurrenceRemarks": "string",
+}
+
+def read_header(file_path):
     """
-    Find all CSV files in the specified directory and combine them into a single DataFrame
-    based on matching column formats.
-    
+    Read only the header of a CSV file.
+
+    Args:
+        file_path (str): Path to the CSV file
+
+    Returns:
+        list: Column names with surrounding whitespace and any BOM removed
+    """
+    columns = pd.read_csv(file_path, nrows=0, encoding="utf-8-sig").columns
+    return [str(col).strip() for col in columns]
+
+def find_csv_files(directory="GAIA"):
+    """
+    Find all CSV files in the specified directory and the unified columns they map onto.
+    Schema columns come first, in schema order; columns outside the schema follow as
+    text, in the order they are first seen.
+
     Args:
         directory (str): The directory to search for CSV files
-        
+
     Returns:
-        DataFrame: Combined DataFrame of all CSV files with matching formats
-        dict: Dictionary of DataFrames that couldn't be combined (grouped by column format)
+        tuple: (columns, files), the unified column order and the readable CSV files
     """
     # Check if the directory exists
     if not os.path.exists(directory):
         print(f"Directory '{directory}' not found.")
-        return None, None
-    
+        return [], []
+
     # Find all CSV files in the directory
-    csv_files = glob.glob(os.path.join(directory, "**", "*.csv"), recursive=True)
-    
+    csv_files = sorted(glob.glob(os.path.join(directory, "**", "*.csv"), recursive=True))
+
     if not csv_files:
         print(f"No CSV files found in '{directory}'.")
-        return None, None
-    
+        return [], []
+
     print(f"Found {len(csv_files)} CSV files.")
-    
-    # Dictionary to store DataFrames grouped by their column signature
-    format_groups = {}
-    
-    # Process each CSV file
+
+    seen, files = [], []
     for file_path in csv_files:
         try:
-            # Read the CSV file
-            df = pd.read_csv(file_path)
-            
-            # Create a signature based on column names
-            column_signature = tuple(df.columns)
-            
-            # Group DataFrames by column signature
-            if column_signature not in format_groups:
-                format_groups[column_signature] = []
-            
-            format_groups[column_signature].append((file_path, df))
-            print(f"Processed: {file_path}")
-            
+            columns = read_header(file_path)
         except Exception as e:
             print(f"Error processing {file_path}: {e}")
-    
-    # Combine DataFrames with the same column format
-    combined_dfs = {}
-    for column_signature, file_df_pairs in format_groups.items():
-        if len(file_df_pairs) > 1:
-            # Extract just the DataFrames
-            dfs = [df for _, df in file_df_pairs]
-            
-            # Combine all DataFrames with the same columns
-            combined_df = pd.concat(dfs, ignore_index=True)
-            combined_dfs[column_signature] = combined_df
-            
-            file_names = [Path(file_path).name for file_path, _ in file_df_pairs]
-            print(f"Combined {len(dfs)} files with columns {column_signature}:")
-            print(f"  - Files: {', '.join(file_names)}")
-        else:
-            # If there's only one file with this format, just add it as is
-            file_path, df = file_df_pairs[0]
-            combined_dfs[column_signature] = df
-            print(f"Unique column format found in {Path(file_path).name}: {column_signature}")
-    
-    # Find the most common format (the one with the most files combined)
-    if combined_dfs:
-        main_format = max(format_groups.keys(), key=lambda k: len(format_groups[k]))
-        main_combined_df = combined_dfs[main_format]
-        remaining_dfs = {k: v for k, v in combined_dfs.items() if k != main_format}
-        
-        return main_combined_df, remaining_dfs
-    
-    return None, None
-
-def save_combined_data(main_df, other_dfs, output_dir="GAIA_combined"):
+            continue
+        files.append(file_path)
+        seen.extend(col for col in columns if col not in seen)
+
+    columns = [col for col in SCHEMA if col in seen] + [col for col in seen if col not in SCHEMA]
+    return columns, files
+
+def cast_column(values, dtype):
+    """
+    Cast text values to a declared dtype; values that do not parse become missing.
     """
-    Save the combined DataFrames to CSV files.
-    
+    if dtype == "string":
+        return values.astype("string")
+    numeric = pd.to_numeric(values, errors="coerce").astype("float64")
+    if dtype == "Int64":
+        numeric = numeric.where(numeric % 1 == 0)  # a fractional count is not a count
+    return numeric.astype(dtype)
+
+def read_unified_chunks(file_path, columns, chunk_size=CHUNK_SIZE):
+    """
+    Stream a CSV file in chunks mapped by column name onto the unified schema.
+
+    Args:
+        file_path (str): Path to the CSV file
+        columns (list): Unified column order
+        chunk_size (int): Rows per chunk
+
+    Yields:
+        DataFrame: Chunk with exactly the given columns, in order, with declared dtypes
+                   (columns missing from the file are empty)
+    """
+    dtypes = {col: SCHEMA.get(col, "string") for col in columns}
+    reader = pd.read_csv(file_path, chunksize=chunk_size, dtype="string", keep_default_na=False,
+                         na_values=[""], encoding="utf-8-sig")
+    for chunk in reader:
+        chunk.columns = [str(col).strip() for col in chunk.columns]
+        chunk = chunk.reindex(columns=columns)
+        for col, dtype in dtypes.items():
+            chunk[col] = cast_column(chunk[col], dtype)
+        yield chunk
+
+def combine_csvs(directory="GAIA", output_dir="GAIA_combined", chunk_size=CHUNK_SIZE):
+    """
+    Combine all CSV files in the directory into combined_main.csv, whatever their format.
+
+    The output is only replaced once every file has been read completely; a file failing
+    mid-read aborts the run and leaves the previous output in place.
+
     Args:
-        main_df (DataFrame): The main combined DataFrame
-        other_dfs (dict): Dictionary of other DataFrames that couldn't be combined with the main one
-        output_dir (str): Directory to save the output files
+        directory (str): The directory to search for CSV files
+        output_dir (str): Directory to save the output file
+        chunk_size (int): Rows read per file at a time
+
+    Returns:
+        dict: Output path -> number of rows written
     """
+    columns, files = find_csv_files(directory)
+    if not files:
+        return {}
+
     # Create output directory if it doesn't exist
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    
-    # Save the main combined DataFrame
-    if main_df is not None:
-        main_output_path = os.path.join(output_dir, "combined_main.csv")
-        main_df.to_csv(main_output_path, index=False)
-        print(f"Main combined data saved to: {main_output_path}")
-    
-    # Save the other DataFrames
-    for i, (cols, df) in enumerate(other_dfs.items() if other_dfs else {}.items()):
-        format_name = f"format_{i+1}"
-        output_path = os.path.join(output_dir, f"combined_{format_name}.csv")
-        df.to_csv(output_path, index=False)
-        print(f"Additional format data saved to: {output_path}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    output_path = os.path.join(output_dir, "combined_main.csv")
+    print(f"Combining {len(files)} files into columns {tuple(columns)}:")
+    print(f"  - Files: {', '.join(Path(file_path).name for file_path in files)}")
+
+    with IntermediateWriter(output_path) as writer:
+        for file_path in files:
+            rows_before = writer.rows
+            try:
+                for chunk in read_unified_chunks(file_path, columns, chunk_size):
+                    writer.write(chunk)
+            except Exception as e:
+                raise RuntimeError(f"Error processing {file_path}: {e}") from e
+            print(f"Processed: {file_path} ({writer.rows - rows_before} rows)")
+
+    print(f"Combined data saved to: {output_path} ({writer.rows} rows)")
+    return {output_path: writer.rows}
 
 if __name__ == "__main__":
     # Find and combine CSV files
-    main_df, other_dfs = find_and_combine_csvs("GAIA")
-    
-    if main_df is not None:
-        print("\nMain combined DataFrame:")
-        print(f"- Shape: {main_df.shape}")
-        print(f"- Columns: {list(main_df.columns)}")
-        
-        # Save the combined data
-        save_combined_data(main_df, other_dfs)
-    else:
-        print("No CSV files could be combined.")
\ No newline at end of file
+    written = combine_csvs("GAIA")
+
+    if not written:
+        print("No CSV files could be combined.")
@@ -5,10 +5,13 @@ Description: Visualizes invasion stage progression and yearly hive density maps
 """
 
 import os
+import sys
 import pandas as pd
-import geopandas as gpd
 import matplotlib.pyplot as plt
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.map_rendering import load_mainland_geometry, render_yearly_maps
+
 # === PATHS ===
 forecast_path = "forecast/forecasting/output/forecast_2026_to_2050.csv"
 historical_path_density = "forecast/data_generated/hive_density_staged.csv"
@@ -54,43 +57,20 @@ plt.savefig(os.path.join(output_folder, "invasion_stage_over_time_spaced.png"),
 plt.close()
 
 # === PLOT: Yearly Hive Density Maps ===
-world = gpd.read_file(shapefile_path)
-europe = world[world['NAME'].isin(df["country"].unique())]
-europe = europe.explode(index_parts=True).reset_index(drop=True)
-europe['area'] = europe.geometry.area
-europe = europe.sort_values(by=['NAME', 'area'], ascending=[True, False])
-europe = europe.drop_duplicates(subset='NAME', keep='first')
+europe = load_mainland_geometry(shapefile_path, df["country"].unique())
 
 vmin = 0
 vmax = 0.015
 
-for year in sorted(df['year'].unique()):
-    df_year = df[df['year'] == year]
-    merged = europe.merge(df_year, left_on='NAME', right_on='country', how='left')
-
-    fig, ax = plt.subplots(figsize=(11, 9))
-    merged.boundary.plot(ax=ax, color="grey", linewidth=0.5)
-    merged.plot(
-        ax=ax,
-        column='hive_density',
-        cmap='OrRd',
-        legend=True,
-        edgecolor='0.8',
-        vmin=vmin,
-        vmax=vmax,
-        missing_kwds={"color": "lightgrey", "label": "No data"}
-    )
-
-    for _, row in merged.iterrows():
-        if pd.notna(row['hive_count']) and row['hive_count'] > 0:
-            centroid = row['geometry'].centroid
-            ax.text(centroid.x, centroid.y, f"{int(row['hive_count'])}", fontsize=6,
-                    ha='center', va='center', color='black')
-
-    ax.set_title(f"Vespa velutina Hive Density – {year}", fontsize=14)
-    ax.axis('off')
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_folder, f"hive_map_{year}.png"), dpi=200)
-    plt.close()
+render_yearly_maps(
+    df, europe,
+    year_column='year',
+    name_column='country',
+    value_column='hive_density',
+    label_column='hive_count',
+    output_path=os.path.join(output_folder, "hive_map_{year}.png"),
+    title="Vespa velutina Hive Density – {year}",
+    plot_kwargs={"cmap": 'OrRd', "legend": True, "edgecolor": '0.8', "vmin": vmin, "vmax": vmax},
+)
 
 print(f"✅ All plots saved to: {output_folder}")
@@ -1,9 +1,16 @@
 import pandas as pd
-import geopandas as gpd
-import matplotlib.pyplot as plt
 import os
+import sys
 #1.6
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.map_rendering import load_mainland_geometry, render_yearly_maps
+
+output_folder = "outputs/estimated_hives_maps"
+save_maps = False  # True: write one PNG per year to output_folder instead of showing the maps
+if save_maps:
+    os.makedirs(output_folder, exist_ok=True)
+
 # === 1. Load data ===
 df = pd.read_csv("estimated_hives_weighted_output_clamped.csv")
 
@@ -27,44 +34,24 @@ if not os.path.exists(shapefile_path):
     raise FileNotFoundError(
         "🌍 Shapefile not found. Please download from naturalearthdata.com and unzip to 'ne_110m_admin_0_countries/'.")
 
-world = gpd.read_file(shapefile_path)
-
-# Filter to only countries we have data for
-europe = world[world['NAME'].isin(name_mapping.values())]
-
-# === 3. Remove islands: keep only largest mainland polygon per country ===
-europe = europe.explode(index_parts=True).reset_index(drop=True)
-europe['area'] = europe.geometry.area
-europe = europe.sort_values(by=['NAME', 'area'], ascending=[True, False])
-europe = europe.drop_duplicates(subset='NAME', keep='first')
+# === 3. Largest mainland polygon per country we have data for (cached next to the shapefile) ===
+europe = load_mainland_geometry(shapefile_path, name_mapping.values())
 
 # === 4. Determine fixed color scale across all years ===
 vmin = 0
 vmax = 10000
 
-# === 5. Plot one map per year ===
-for year in sorted(df['year'].unique()):
-    df_year = df[df['year'] == year]
-    merged = europe.merge(df_year, left_on='NAME', right_on='country_gis', how='left')
-
-    fig, ax = plt.subplots(figsize=(10, 8))
-
-    # Draw country borders
-    merged.boundary.plot(ax=ax, color="grey", linewidth=0.6)
-
-    # Fill countries by hive count with fixed scale
-    merged.plot(
-        ax=ax,
-        column='estimated_hives_with_weighting',
-        cmap='Reds',
-        legend=True,
-        edgecolor='0.8',
-        vmin=vmin,
-        vmax=vmax,
-        missing_kwds={"color": "lightgrey", "label": "No data"}
-    )
-
-    ax.set_title(f"Estimated Vespa velutina Hives – {year}", fontsize=14)
-    ax.axis('off')
-    plt.tight_layout()
-    plt.show()
+# === 5. Render one map per year (in parallel) ===
+render_yearly_maps(
+    df.dropna(subset=['country_gis']), europe,
+    year_column='year',
+    name_column='country_gis',
+    value_column='estimated_hives_with_weighting',  # fill by hive count with fixed scale
+    output_path=os.path.join(output_folder, "estimated_hives_{year}.png") if save_maps else None,
+    title="Estimated Vespa velutina Hives – {year}",
+    plot_kwargs={"cmap": 'Reds', "legend": True, "edgecolor": '0.8', "vmin": vmin, "vmax": vmax},
+    boundary_kwargs={"color": "grey", "linewidth": 0.6},
+    figsize=(10, 8),
+)
+if save_maps:
+    print(f"✅ Maps saved to: {output_folder}")
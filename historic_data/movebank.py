@@ -1,203 +1,225 @@
-import requests
-import pandas as pd
-import json
 import os
-from datetime import datetime
+import sys
+import json
 import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.http_session import pooled_session
 
 # Movebank API base URL
 MOVEBANK_API_BASE = "https://www.movebank.org/movebank/service/direct-read"
 
-def test_api_connection():
-    """Test if we can connect to the Movebank API."""
-    print("Testing connection to Movebank API...")
-    
-    # Try accessing the studies endpoint
+# Study list cached between runs; re-validated with the server once it is older than this
+STUDY_CACHE_PATH = "movebank_studies.json"
+STUDY_CACHE_MAX_AGE = 24 * 3600  # seconds
+
+OUTPUT_DIR = "movebank"
+CHUNK_BYTES = 1 << 20
+N_WORKERS = 4
+
+SEARCH_TERMS = ["asian hornet", "vespa velutina", "vespa mandarinia", "hornet", "vespa"]
+
+# Types of the core event columns in the Parquet copy; every other column is kept as text,
+# since sparse columns can be empty for millions of rows before their first value
+EVENT_COLUMN_TYPES = {
+    "event-id": "int64",
+    "timestamp": "timestamp[ms]",
+    "location-long": "double",
+    "location-lat": "double",
+}
+
+
+def get_all_studies(session, cache_path=STUDY_CACHE_PATH, max_age=STUDY_CACHE_MAX_AGE, base_url=MOVEBANK_API_BASE):
+    """Get a list of all studies from Movebank, served from the local cache when possible.
+
+    A cache younger than max_age is used without asking the server. An older one is
+    re-validated with a conditional request (ETag / Last-Modified) and only downloaded
+    again when the list has changed.
+    """
+    cache = None
     try:
-        response = requests.get(f"{MOVEBANK_API_BASE}/json/study")
-        print(f"Status code: {response.status_code}")
-        
-        if response.status_code == 200:
-            print("Successfully connected to the API!")
-            return True
-        else:
-            print(f"Connection failed. Response: {response.text[:500]}...")
-            return False
-    except Exception as e:
-        print(f"Error connecting to API: {e}")
-        return False
-
-def get_all_studies():
-    """Get a list of all studies from Movebank."""
+        with open(cache_path, encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    if cache and time.time() - cache.get("fetched", 0) < max_age:
+        print(f"Using cached study list ({len(cache['studies'])} studies)")
+        return cache["studies"]
+
+    headers = {}
+    if cache and cache.get("etag"):
+        headers["If-None-Match"] = cache["etag"]
+    if cache and cache.get("last_modified"):
+        headers["If-Modified-Since"] = cache["last_modified"]
+
     print("Retrieving all studies...")
-    
-    try:
-        # According to the documentation, this endpoint should list all studies
-        response = requests.get(f"{MOVEBANK_API_BASE}/json/study")
-        
-        if response.status_code == 200:
-            studies = response.json()
-            print(f"Successfully retrieved {len(studies)} studies")
-            return studies
-        else:
-            print(f"Failed to retrieve studies. Status code: {response.status_code}")
-            print(f"Response: {response.text[:500]}...")
-            return []
-    except Exception as e:
-        print(f"Error retrieving studies: {e}")
+    response = session.get(f"{base_url}/json/study", headers=headers, timeout=120)
+    if response.status_code == 304:
+        print(f"Study list unchanged ({len(cache['studies'])} studies)")
+        studies = cache["studies"]
+    elif response.status_code == 200:
+        studies = response.json()
+        print(f"Successfully retrieved {len(studies)} studies")
+    else:
+        print(f"Failed to retrieve studies. Status code: {response.status_code}")
+        print(f"Response: {response.text[:500]}...")
+        if cache:
+            print("Using the cached study list instead")
+            return cache["studies"]
         return []
 
+    with open(cache_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({
+            "fetched": time.time(),
+            "etag": response.headers.get("ETag", cache.get("etag") if cache else None),
+            "last_modified": response.headers.get("Last-Modified", cache.get("last_modified") if cache else None),
+            "studies": studies,
+        }, f)
+    os.replace(cache_path + ".tmp", cache_path)
+    return studies
+
+
 def search_asian_hornet_studies(studies):
     """Filter studies related to Asian hornets."""
-    search_terms = ["asian hornet", "vespa velutina", "vespa mandarinia", "hornet", "vespa"]
-    
     hornet_studies = []
     for study in studies:
         study_str = json.dumps(study).lower()
-        if any(term in study_str for term in search_terms):
+        if any(term in study_str for term in SEARCH_TERMS):
             hornet_studies.append(study)
-    
+
     print(f"Found {len(hornet_studies)} potentially relevant studies")
     return hornet_studies
 
-def get_study_details(study_id):
-    """Get detailed information about a specific study."""
-    print(f"Getting details for study {study_id}...")
-    
-    try:
-        response = requests.get(f"{MOVEBANK_API_BASE}/json/study?study_id={study_id}")
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            print(f"Failed to get study details. Status code: {response.status_code}")
-            print(f"Response: {response.text[:500]}...")
-            return None
-    except Exception as e:
-        print(f"Error getting study details: {e}")
-        return None
 
-def download_study_data(study_id):
-    """Download movement data for a specific study."""
+def stream_to_file(response, path, chunk_bytes=CHUNK_BYTES):
+    """Write a streamed response to path chunk by chunk; returns the number of bytes."""
+    size = 0
+    with open(path + ".part", "wb") as f:
+        for chunk in response.iter_content(chunk_size=chunk_bytes):
+            f.write(chunk)
+            size += len(chunk)
+    os.replace(path + ".part", path)
+    return size
+
+
+def csv_to_parquet(csv_path, parquet_path, block_bytes=CHUNK_BYTES * 16, column_types=EVENT_COLUMN_TYPES):
+    """Convert a downloaded CSV to Parquet block by block, without loading it whole.
+
+    The schema is declared up front from the header instead of inferred from the first
+    block: columns in column_types get that type, all others are read as strings.
+    """
+    import csv
+    import pyarrow as pa
+    import pyarrow.csv as pv
+    import pyarrow.parquet as pq
+
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        header = next(csv.reader(f), [])
+    types = {name: pa.type_for_alias(column_types.get(name, "string")) for name in header}
+
+    reader = pv.open_csv(csv_path, read_options=pv.ReadOptions(block_size=block_bytes),
+                         convert_options=pv.ConvertOptions(column_types=types, strings_can_be_null=True))
+    rows = 0
+    with pq.ParquetWriter(parquet_path + ".part", reader.schema) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    os.replace(parquet_path + ".part", parquet_path)
+    return rows
+
+
+def download_study_data(session, study_id, output_dir=OUTPUT_DIR, fmt="csv", base_url=MOVEBANK_API_BASE):
+    """Download the event data of one study straight to disk.
+
+    The CSV is streamed to output_dir/study_<id>.csv; with fmt="parquet" it is then
+    converted to study_<id>.parquet and the CSV removed. Returns the written path, or
+    None when the study cannot be downloaded.
+    """
     print(f"Downloading data for study {study_id}...")
-    
-    # First try without license acceptance
-    try:
-        url = f"{MOVEBANK_API_BASE}/csv/event?study_id={study_id}"
-        response = requests.get(url)
-        
-        if response.status_code == 200:
-            # Convert to DataFrame
-            data = pd.read_csv(pd.io.common.StringIO(response.text))
-            print(f"Downloaded {len(data)} data points")
-            return data
-        elif response.status_code == 403:
-            print("License acceptance required. Trying with license terms...")
-            
-            # Try with license acceptance
-            url_with_license = f"{MOVEBANK_API_BASE}/csv/event?study_id={study_id}&license-md5=null&i_agree_to_terms_of_use=true"
-            license_response = requests.get(url_with_license)
-            
-            if license_response.status_code == 200:
-                data = pd.read_csv(pd.io.common.StringIO(license_response.text))
-                print(f"Downloaded {len(data)} data points")
-                return data
-            else:
-                print(f"Failed to download with license acceptance. Status code: {license_response.status_code}")
-                print(f"Response: {license_response.text[:500]}...")
-                return None
-        else:
-            print(f"Failed to download data. Status code: {response.status_code}")
+    url = f"{base_url}/csv/event"
+    params = {"study_id": study_id}
+
+    response = session.get(url, params=params, stream=True, timeout=120)
+    if response.status_code == 403:
+        print(f"Study {study_id}: license acceptance required. Trying with license terms...")
+        response.close()
+        params.update({"license-md5": "null", "i_agree_to_terms_of_use": "true"})
+        response = session.get(url, params=params, stream=True, timeout=120)
+
+    with response:
+        if response.status_code != 200:
+            print(f"Failed to download study {study_id}. Status code: {response.status_code}")
             print(f"Response: {response.text[:500]}...")
             return None
-    except Exception as e:
-        print(f"Error downloading data: {e}")
-        return None
+        csv_path = os.path.join(output_dir, f"study_{study_id}.csv")
+        size = stream_to_file(response, csv_path)
+    print(f"Study {study_id}: {size / 1e6:.1f} MB saved to {csv_path}")
+
+    if fmt != "parquet":
+        return csv_path
+    parquet_path = os.path.splitext(csv_path)[0] + ".parquet"
+    rows = csv_to_parquet(csv_path, parquet_path)
+    os.remove(csv_path)
+    print(f"Study {study_id}: {rows} data points saved to {parquet_path}")
+    return parquet_path
+
+
+def download_studies(session, study_ids, output_dir=OUTPUT_DIR, fmt="csv", n_workers=N_WORKERS,
+                     base_url=MOVEBANK_API_BASE):
+    """Download several studies concurrently. Returns {study id: path or None}."""
+    os.makedirs(output_dir, exist_ok=True)
+    results = {}
+    with ThreadPoolExecutor(max_workers=n_workers) as pool:
+        futures = {pool.submit(download_study_data, session, study_id, output_dir, fmt, base_url): study_id
+                   for study_id in study_ids}
+        for future in as_completed(futures):
+            study_id = futures[future]
+            try:
+                results[study_id] = future.result()
+            except Exception as e:
+                print(f"Error downloading study {study_id}: {e}")
+                results[study_id] = None
+    return results
+
 
 def main():
-    """Main function to execute the workflow."""
-    # Step 1: Test API connection
-    if not test_api_connection():
-        print("\nCannot connect to Movebank API. There might be several reasons:")
-        print("1. The API structure might have changed")
-        print("2. The API might be temporarily unavailable")
-        print("3. Your network might be blocking the connection")
-        print("\nLet's try accessing data through the web interface instead:")
-        print("1. Visit: https://www.movebank.org/cms/webapp")
-        print("2. Search for 'Asian hornet', 'vespa velutina', or 'vespa mandarinia'")
-        print("3. Download the data manually")
-        return
-    
-    # Step 2: Get all studies
-    all_studies = get_all_studies()
-    
-    if not all_studies:
-        print("Could not retrieve studies list.")
-        return
-    
-    # Step 3: Filter for Asian hornet studies
-    hornet_studies = search_asian_hornet_studies(all_studies)
-    
-    if not hornet_studies:
-        print("No Asian hornet studies found.")
-        return
-    
-    # Step 4: Display available studies
-    print("\nAvailable studies that might contain Asian hornet data:")
-    for i, study in enumerate(hornet_studies):
-        print(f"{i+1}. {study.get('name', 'Unnamed study')} (ID: {study.get('id')})")
-    
-    # Step 5: Let user select a study
-    try:
-        selected_idx = int(input("\nEnter the number of the study you want to explore (or 0 to exit): ")) - 1
-        
-        if selected_idx == -1:
-            print("Exiting program.")
+    """Download every matched hornet study (or the given ones) without prompting."""
+    parser = argparse.ArgumentParser(description="Download Asian hornet tracking studies from Movebank.")
+    parser.add_argument("study_ids", nargs="*", help="studies to download (default: all matched hornet studies)")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="output format")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--workers", type=int, default=N_WORKERS, help="concurrent downloads")
+    parser.add_argument("--refresh", action="store_true", help="re-validate the cached study list now")
+    args = parser.parse_args()
+
+    session = pooled_session(args.workers)
+    study_ids = args.study_ids
+    if not study_ids:
+        studies = get_all_studies(session, max_age=0 if args.refresh else STUDY_CACHE_MAX_AGE)
+        if not studies:
+            print("Could not retrieve studies list.")
             return
-            
-        if 0 <= selected_idx < len(hornet_studies):
-            selected_study = hornet_studies[selected_idx]
-            study_id = selected_study.get('id')
-            print(f"\nSelected study: {selected_study.get('name')} (ID: {study_id})")
-            
-            # Step 6: Get study details
-            study_details = get_study_details(study_id)
-            
-            if study_details:
-                print("\nStudy details:")
-                details = study_details[0] if isinstance(study_details, list) else study_details
-                print(f"Name: {details.get('name', 'N/A')}")
-                if 'principal_investigator_name' in details:
-                    print(f"Principal investigator: {details.get('principal_investigator_name')}")
-                if 'study_objective' in details:
-                    print(f"Study objective: {details.get('study_objective')}")
-            
-            # Step 7: Download data
-            data = download_study_data(study_id)
-            
-            if data is not None and not data.empty:
-                # Save to CSV
-                filename = f"asian_hornet_data_{study_id}_{datetime.now().strftime('%Y%m%d')}.csv"
-                data.to_csv(filename, index=False)
-                print(f"\nData saved to {filename}")
-                
-                # Display data summary
-                print("\nData summary:")
-                print(f"Number of records: {len(data)}")
-                print(f"Columns available: {', '.join(data.columns)}")
-                
-                # Show preview
-                print("\nData preview:")
-                print(data.head())
-            else:
-                print("\nNo data retrieved. This study might be private or require authentication.")
-                print("Consider using the web interface to access this data.")
-        else:
-            print("Invalid selection.")
-    except ValueError:
-        print("Please enter a valid number.")
-    except Exception as e:
-        print(f"An error occurred: {e}")
+
+        hornet_studies = search_asian_hornet_studies(studies)
+        if not hornet_studies:
+            print("No Asian hornet studies found.")
+            return
+
+        print("\nStudies that might contain Asian hornet data:")
+        for study in hornet_studies:
+            print(f"- {study.get('name', 'Unnamed study')} (ID: {study.get('id')})")
+        study_ids = [study.get('id') for study in hornet_studies]
+
+    results = download_studies(session, study_ids, args.output_dir, args.format, args.workers)
+    saved = [path for path in results.values() if path]
+    print(f"\n{len(saved)} of {len(results)} studies saved to {args.output_dir}")
+    for study_id, path in results.items():
+        if not path:
+            print(f"- study {study_id}: not downloaded (private or requires authentication)")
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,17 +1,24 @@
 import pandas as pd
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.predation import LAST_COMPLETE_YEAR, scores_for_years
  
 # === ⬇️ Load tvoje forecast dáta ===
-forecast_path = "/content/forecast_2026_to_2050 (1).csv"
+forecast_path = "../forecast/forecasting/output/forecast_2026_to_2050.csv"  # výstup forecast_spread_to_2050.py
 df_forecast = pd.read_csv(forecast_path)
  
-# === ⬇️ Load predation_score (2024) ===
-predation_path = "output/predation_score_2024_scaled.csv"
-df_predation = pd.read_csv(predation_path)[["country", "predation_score"]]
+# === ⬇️ Load predation_score po rokoch (výstup sum_pred.py) ===
+# Každý rok forecastu použije posledný úplný rok so skóre (<= daný rok a <= last_score_year)
+predation_path = "output/predation_score_by_year.csv"
+last_score_year = LAST_COMPLETE_YEAR  # dáta predátorov končia 2025-05-23, rok 2025 nie je úplný
+df_predation = scores_for_years(pd.read_csv(predation_path), sorted(df_forecast["year"].unique()),
+                                last_year=last_score_year)
  
-# === 🔗 Spojenie podľa krajiny ===
-df_combined = df_forecast.merge(df_predation, on="country", how="left")
-df_combined["predation_score"].fillna(0.0, inplace=True)  # pre istotu
+# === 🔗 Spojenie podľa roku a krajiny ===
+df_combined = df_forecast.merge(df_predation, on=["year", "country"], how="left")
+df_combined["predation_score"] = df_combined["predation_score"].fillna(0.0)  # pre istotu
  
 # === 🧮 Adjust hive_density podľa predátorov ===
 df_combined["adjusted_hive_density"] = df_combined["hive_density"].astype(float) * (1 - df_combined["predation_score"])
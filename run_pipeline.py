@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+File: run_pipeline.py
+Description: Runs the whole chain, from the raw GAIA sightings to the bee forecast, as
+             declared stages (see common/pipeline.py). Stages whose code and input files
+             are unchanged since their last run are skipped, so e.g. editing the stage
+             thresholds in AssignInvasionStage.py re-runs only the staging and what
+             follows it, not the clustering of the sightings. Independent branches (the
+             predation score and the historic/forecast chain) run in parallel.
+
+Usage:
+    python run_pipeline.py                         bring every stage up to date
+    python run_pipeline.py bee_correlation         a stage and what it depends on
+    python run_pipeline.py --dry-run               list the stages that would run
+    python run_pipeline.py --force assign_stages   re-run a stage even if current
+
+The historic_data scripts run in preparingHistoricalData/, the folder holding their data
+and the shapefile, which the forecast and bee scripts read from.
+"""
+
+import os
+import sys
+import logging
+import argparse
+
+from common.pipeline import Pipeline
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+HISTORIC_DIR = "preparingHistoricalData"
+SHAPEFILE = "ne_110m_admin_0_countries/ne_110m_admin_0_countries"
+HISTORIC_SHAPEFILE = [f"{SHAPEFILE}.shp", f"{SHAPEFILE}.dbf"]
+SHARED_SHAPEFILE = [f"../{HISTORIC_DIR}/{path}" for path in HISTORIC_SHAPEFILE]
+
+# Inputs and outputs are relative to the stage's cwd, as written in the scripts
+STAGES = [
+    # === HISTORIC DATA ===
+    {
+        "name": "combine_observations",
+        "script": "historic_data/combine_cvs.py",
+        "cwd": HISTORIC_DIR,
+        "inputs": ["GAIA"],
+        "outputs": ["GAIA_combined/combined_main.csv"],
+    },
+    {
+        "name": "estimate_hives",
+        "script": "historic_data/HiveCountTableCreating.py",
+        "cwd": HISTORIC_DIR,
+        "inputs": ["GAIA_combined/combined_main.csv"],
+        "outputs": ["estimated_hives_summary.csv"],
+    },
+    {
+        "name": "compare_known_nests",
+        "script": "historic_data/CompareRealVsEstimate.py",
+        "cwd": HISTORIC_DIR,
+        "inputs": ["estimated_hives_summary.csv"] + HISTORIC_SHAPEFILE,
+        "outputs": ["comparison_known_vs_estimated_hives.csv", "hive_weighting_table.csv"],
+    },
+    {
+        "name": "weight_countries",
+        "script": "historic_data/CoutriesTableCreation.py",
+        "cwd": HISTORIC_DIR,
+        "inputs": ["estimated_hives_summary.csv", "hive_weighting_table.csv"] + HISTORIC_SHAPEFILE,
+        "outputs": ["estimated_hives_weighted_output_clamped.csv"],
+    },
+    {
+        "name": "adapt_numbers",
+        "script": "historic_data/adaptNumbers.py",
+        "cwd": HISTORIC_DIR,
+        "inputs": ["estimated_hives_weighted_output_clamped.csv", "vlasta/yearly_country_nest_summary.csv"],
+        "outputs": ["estimated_hives_weighted_output_clamped.csv"],
+    },
+    # === HORNET FORECAST ===
+    {
+        "name": "hive_density",
+        "script": "forecast/ComputeHiveDensity.py",
+        "inputs": [f"../{HISTORIC_DIR}/estimated_hives_weighted_output_clamped.csv"] + SHARED_SHAPEFILE,
+        "outputs": ["data_generated/hive_density_by_country_year.csv"],
+    },
+    {
+        "name": "assign_stages",
+        "script": "forecast/AssignInvasionStage.py",
+        "inputs": ["data_generated/hive_density_by_country_year.csv"],
+        "outputs": ["data_generated/hive_density_staged.csv"],
+    },
+    {
+        "name": "forecast_spread",
+        "script": "forecast/forecast_spread_to_2050.py",
+        "inputs": ["data_generated/hive_density_staged.csv"] + SHARED_SHAPEFILE,
+        "outputs": ["forecasting/output/forecast_2026_to_2050.csv"],
+    },
+    # === PREDATION ===
+    {
+        "name": "predation_score",
+        "script": "predator/sum_pred.py",
+        "inputs": ["../gaia_api/predator_occurrences.parquet", "ne_110m_admin_0_countries.zip"],
+        "outputs": ["output/predator_counts_by_year.csv", "output/predation_score_by_year.csv",
+                    "output/predation_score_2024_scaled.csv"],
+    },
+    {
+        "name": "predation_adjustment",
+        "script": "predator/load_forecast.py",
+        "inputs": ["../forecast/forecasting/output/forecast_2026_to_2050.csv",
+                   "output/predation_score_by_year.csv"],
+        "outputs": ["output/forecast_with_predation_adjustment.csv"],
+    },
+    # === BEES ===
+    {
+        "name": "bee_preparation",
+        "script": "bees/dataPreparation.py",
+        "inputs": ["../forecast/forecasting/output/forecast_2026_to_2050.csv",
+                   "../forecast/data_generated/hive_density_staged.csv",
+                   "honeybees_2004-2024.csv"] + SHARED_SHAPEFILE,
+        "outputs": ["output/hornet_combined_corrected.csv", "output/bee_density_trends.csv"],
+    },
+    {
+        "name": "bee_correlation",
+        "script": "bees/correlationByCountry.py",
+        "inputs": ["output/hornet_combined_corrected.csv", "output/bee_density_trends.csv"],
+        "outputs": ["output/correlationByCountry.csv"],
+    },
+    {
+        "name": "bee_scenarios",
+        "script": "bees/forecast_scenarios.py",
+        "inputs": ["output/bee_density_trends.csv", "output/correlationByCountry.csv",
+                   "output/hornet_combined_corrected.csv",
+                   "../predator/output/forecast_with_predation_adjustment.csv"],
+        "outputs": ["output/bee_forecast_scenarios.csv", "output/bee_forecast_2026_to_2050.csv",
+                    "output/bee_forecast_2026_to_2050_realistic.csv",
+                    "../bees_predator_hornets/output/bee_forecast_2026_to_2050_realistic.csv"],
+    },
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the hornet/bee pipeline, skipping up-to-date stages.")
+    parser.add_argument("stages", nargs="*", help="stages to bring up to date (default: all)")
+    parser.add_argument("--force", nargs="*", default=[], metavar="STAGE", help="re-run these stages")
+    parser.add_argument("--workers", type=int, default=4, help="stages run at the same time")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would run")
+    args = parser.parse_args()
+
+    pipeline = Pipeline(STAGES, root=os.path.dirname(os.path.abspath(__file__)))
+    status = pipeline.run(args.stages, force=set(args.force), n_workers=args.workers, dry_run=args.dry_run)
+
+    for name, result in status.items():
+        logger.info(f"{name:<22} {result}")
+    if any(result in ("failed", "blocked") for result in status.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,97 +1,66 @@
-import csv
+import os
+import sys
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.storage import IntermediateWriter
 
 # --- Configuration ---
-file1_name = "combined_main.csv"
-file2_name = "combined_old format_to_2009.csv"
+input_files = ["combined_main.csv"] # Every GAIA export format, combined by historic_data/combine_cvs.py
 output_file_name = "merged_data.csv"
-column_to_drop_from_file1 = "behavior"
+output_columns = ["eventDate", "decimalLatitude", "decimalLongitude"] # Columns used downstream (nests.py)
+numeric_columns = ["decimalLatitude", "decimalLongitude"] # Parsed as numbers, everything else is kept as text
+block_rows = 500_000 # Rows read and written per block
 # ---------------------
 
-def combine_csvs(main_file, old_file, output_file, column_to_drop):
+def read_blocks(input_file, columns, block_size):
     """
-    Combines two CSV files, dropping a specified column from the first file.
-    The header of the second file is assumed to be the target header structure.
+    Reads the given columns of a CSV file in blocks, matched by header name.
+    Coordinates are parsed as numbers; other values are kept as text so they are
+    written out exactly as read.
     """
-    print(f"Combining '{main_file}' and '{old_file}' into '{output_file}'...")
-    print(f"Dropping column '{column_to_drop}' from '{main_file}'.")
-
-    try:
-        with open(output_file, 'w', newline='', encoding='utf-8') as outfile:
-            writer = csv.writer(outfile)
-            
-            # --- Process the first file (combined_main.csv) ---
-            try:
-                with open(main_file, 'r', newline='', encoding='utf-8') as infile1:
-                    reader1 = csv.reader(infile1)
-                    
-                    # Read and process header from the first file
-                    header1 = next(reader1)
-                    try:
-                        drop_index = header1.index(column_to_drop)
-                    except ValueError:
-                        print(f"Error: Column '{column_to_drop}' not found in the header of '{main_file}'.")
-                        print(f"Header found: {header1}")
-                        return False
+    header = [col.strip() for col in pd.read_csv(input_file, nrows=0, encoding="utf-8-sig").columns]
+    missing = [col for col in columns if col not in header]
+    if missing:
+        raise KeyError(f"Column(s) {missing} not found in the header of '{input_file}'. Header found: {header}")
 
-                    # Create the output header by excluding the dropped column
-                    output_header = [col for i, col in enumerate(header1) if i != drop_index]
-                    writer.writerow(output_header)
-                    
-                    # Process data rows from the first file
-                    rows_written_file1 = 0
-                    for row in reader1:
-                        if len(row) == len(header1): # Ensure row has expected number of columns
-                            modified_row = [cell for i, cell in enumerate(row) if i != drop_index]
-                            writer.writerow(modified_row)
-                            rows_written_file1 += 1
-                        else:
-                            print(f"Warning: Skipping malformed row in '{main_file}' (expected {len(header1)} columns, got {len(row)}): {row}")
-                    print(f"Processed {rows_written_file1} data rows from '{main_file}'.")
+    reader = pd.read_csv(input_file, usecols=lambda col: col.strip() in columns, dtype=str,
+                         keep_default_na=False, chunksize=block_size, on_bad_lines="warn",
+                         encoding="utf-8-sig")
+    for block in reader:
+        block.columns = [col.strip() for col in block.columns]
+        block = block[columns].copy()
+        for col in numeric_columns:
+            if col in block.columns:
+                block[col] = pd.to_numeric(block[col], errors="coerce")
+        yield block
 
-            except FileNotFoundError:
-                print(f"Error: File '{main_file}' not found.")
-                return False
-            except Exception as e:
-                print(f"An error occurred while processing '{main_file}': {e}")
-                return False
-
-            # --- Process the second file (combined_old format_to_2009.csv) ---
-            try:
-                with open(old_file, 'r', newline='', encoding='utf-8') as infile2:
-                    reader2 = csv.reader(infile2)
-                    
-                    # Skip header of the second file (assuming it matches output_header structure)
-                    header2 = next(reader2)
-                    if len(header2) != len(output_header):
-                        print(f"Warning: Header of '{old_file}' has {len(header2)} columns, "
-                              f"but expected {len(output_header)} based on '{main_file}' after dropping a column.")
-                        print(f"Header of '{old_file}': {header2}")
-                        print(f"Target header: {output_header}")
-                        # Continue, but be aware of potential mismatches.
-
-                    # Process data rows from the second file
-                    rows_written_file2 = 0
-                    for row in reader2:
-                        if len(row) == len(output_header): # Check against the target number of columns
-                            writer.writerow(row)
-                            rows_written_file2 += 1
-                        elif len(row) == len(header2): # If it matches its own header but not target
-                            print(f"Warning: Row in '{old_file}' matches its own header columns ({len(header2)}) "
-                                  f"but not target columns ({len(output_header)}). Skipping: {row}")
-                        else:
-                             print(f"Warning: Skipping malformed row in '{old_file}' (expected {len(header2)} or {len(output_header)} columns, got {len(row)}): {row}")
-                    print(f"Processed {rows_written_file2} data rows from '{old_file}'.")
+def combine_csvs(input_files, output_file, columns=output_columns, block_size=block_rows):
+    """
+    Combines CSV files into one with only the given columns.
+    Columns are aligned by header name, so the files may differ in column order
+    and in the columns they carry beyond the requested ones.
+    """
+    print(f"Combining {', '.join(repr(f) for f in input_files)} into '{output_file}'...")
+    print(f"Keeping columns: {columns}")
 
-            except FileNotFoundError:
-                print(f"Error: File '{old_file}' not found.")
-                return False # Or decide if partial completion is okay
-            except Exception as e:
-                print(f"An error occurred while processing '{old_file}': {e}")
-                return False
+    try:
+        with IntermediateWriter(output_file) as writer:
+            for input_file in input_files:
+                rows_before = writer.rows
+                for block in read_blocks(input_file, columns, block_size):
+                    writer.write(block)
+                print(f"Processed {writer.rows - rows_before} data rows from '{input_file}'.")
 
-        print(f"Successfully combined files into '{output_file}'.")
+        print(f"Successfully combined {writer.rows} rows into '{output_file}'.")
         return True
 
+    except FileNotFoundError as e:
+        print(f"Error: File '{e.filename}' not found.")
+        return False
+    except KeyError as e:
+        print(f"Error: {e.args[0]}")
+        return False
     except IOError:
         print(f"Error: Could not write to output file '{output_file}'. Check permissions.")
         return False
@@ -101,16 +70,9 @@ def combine_csvs(main_file, old_file, output_file, column_to_drop):
 
 # --- Main execution ---
 if __name__ == "__main__":
-
-    
     # Combine the CSVs
-    success = combine_csvs(file1_name, file2_name, output_file_name, column_to_drop_from_file1)
+    success = combine_csvs(input_files, output_file_name)
 
     if success:
-        print("\n--- Contents of the merged file: ---")
-        try:
-            with open(output_file_name, 'r', newline='', encoding='utf-8') as f:
-                for line in f:
-                    print(line, end='')
-        except FileNotFoundError:
-            print(f"Could not read '{output_file_name}' to display contents.")
\ No newline at end of file
+        print("\n--- First rows of the merged file: ---")
+        print(pd.read_csv(output_file_name, nrows=5).to_string(index=False))
@@ -6,8 +6,11 @@ Description: Forecasts bee colony decline until 2050 based on hornet spread
 """
 
 import pandas as pd
-import geopandas as gpd
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.country_areas import load_country_areas
 
 # === PATHS ===
 hornet_path = "output/hornet_combined_corrected.csv"
@@ -60,9 +63,7 @@ neighbors = {
 }
 
 # === AREA LOOKUP ===
-gdf = gpd.read_file(shapefile_path).to_crs(epsg=6933)
-gdf["Area_km2"] = gdf["geometry"].area / 1e6
-area_map = gdf.set_index("ADMIN")["Area_km2"].to_dict()
+area_map = load_country_areas(shapefile_path)
 
 # === INITIALIZE STATE ===
 latest_bees = bees[bees["Year"] == 2024][["Country", "Bee_Density", "Bee_Count", "Area_km2"]].dropna()
@@ -1,9 +1,13 @@
+import os
+import sys
 import pandas as pd
 from sklearn.cluster import DBSCAN
 import numpy as np
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
-import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.grid_clustering import grid_cluster
+from common.country_lookup import assign_countries
+from common.storage import load_intermediate
 
 # --- Configuration ---
 INPUT_CSV = "merged_data.csv"
@@ -13,36 +17,14 @@ ACTIVE_MONTH_END = 11 # November
 NEST_PROXIMITY_KM = 2.0 # If sightings are within 2km, they might be from the same nest.
 MIN_SIGHTINGS_FOR_NEST_CLUSTER = 1 # Minimum sightings to form a potential nest cluster
 EARTH_RADIUS_KM = 6371.0 # For converting km to radians for DBSCAN with haversine
-
-# --- Helper Functions ---
-def get_country_from_coords(lat, lon, geolocator, retries=3, delay=1):
-    """
-    Gets the country from latitude and longitude using geopy.
-    """
-    for attempt in range(retries):
-        try:
-            location = geolocator.reverse((lat, lon), exactly_one=True, language='en', timeout=10)
-            if location and location.raw and 'address' in location.raw and 'country' in location.raw['address']:
-                return location.raw['address']['country']
-            else:
-                return "Unknown" # Or None, if preferred
-        except GeocoderTimedOut:
-            print(f"Geocoder timed out for ({lat}, {lon}). Retrying ({attempt+1}/{retries})...")
-            time.sleep(delay * (attempt + 1))
-        except GeocoderUnavailable:
-            print(f"Geocoder service unavailable for ({lat}, {lon}). Retrying ({attempt+1}/{retries})...")
-            time.sleep(delay * (attempt + 1))
-        except Exception as e:
-            print(f"An error occurred during geocoding for ({lat}, {lon}): {e}")
-            return "Error" # Or None
-    return "Failed after retries"
+SHAPEFILE_PATH = "../preparingHistoricalData/ne_110m_admin_0_countries/ne_110m_admin_0_countries.shp"
 
 # --- Main Logic ---
 def find_potential_nests():
     print(f"Loading data from {INPUT_CSV}...")
     try:
         # Load only necessary columns to save memory
-        df = pd.read_csv(INPUT_CSV, usecols=['eventDate', 'decimalLatitude', 'decimalLongitude'])
+        df = load_intermediate(INPUT_CSV, columns=['eventDate', 'decimalLatitude', 'decimalLongitude'])
     except FileNotFoundError:
         print(f"Error: Input file '{INPUT_CSV}' not found.")
         return
@@ -76,9 +58,6 @@ def find_potential_nests():
         print("No data found within the active season. Exiting.")
         return
 
-    # Initialize geolocator
-    geolocator = Nominatim(user_agent="hornet_nest_locator_v1.1") # Use a descriptive user agent
-
     potential_nests_list = []
     
     eps_rad = NEST_PROXIMITY_KM / EARTH_RADIUS_KM
@@ -91,12 +70,15 @@ def find_potential_nests():
             continue
         
         coords = year_data[['decimalLatitude', 'decimalLongitude']].values
-        coords_rad = np.radians(coords)
-        
-        db = DBSCAN(eps=eps_rad, min_samples=MIN_SIGHTINGS_FOR_NEST_CLUSTER, 
-                    algorithm='ball_tree', metric='haversine').fit(coords_rad)
-        
-        labels = db.labels_
+
+        if MIN_SIGHTINGS_FOR_NEST_CLUSTER == 1:
+            # Connected components within the proximity radius: same labels as DBSCAN
+            labels = grid_cluster(coords[:, 0], coords[:, 1], NEST_PROXIMITY_KM, earth_radius_km=EARTH_RADIUS_KM)
+        else:
+            coords_rad = np.radians(coords)
+            db = DBSCAN(eps=eps_rad, min_samples=MIN_SIGHTINGS_FOR_NEST_CLUSTER, 
+                        algorithm='ball_tree', metric='haversine').fit(coords_rad)
+            labels = db.labels_
         year_data['cluster_label'] = labels
         
         num_clusters = len(set(labels)) - (1 if -1 in labels else 0)
@@ -116,18 +98,12 @@ def find_potential_nests():
 
             print(f"  Cluster {cluster_id}: {sightings_count} sightings. Centroid: ({nest_latitude:.4f}, {nest_longitude:.4f})")
 
-            country = get_country_from_coords(nest_latitude, nest_longitude, geolocator)
-            print(f"    Country: {country}")
-            
-            # --- MODIFICATION HERE ---
             potential_nests_list.append({
                 'year': year,
                 'nest_latitude': nest_latitude, # Changed 'nest_latitude' to 'decimalLatitude' for consistency
                 'nest_longitude': nest_longitude, # Changed 'nest_longitude' to 'decimalLongitude' for consistency
-                'country': country,
                 'sightings_count': sightings_count # <--- Added the sightings count
             })
-            time.sleep(0.35)
 
     if not potential_nests_list:
         print("\nNo potential nests identified after processing all years.")
@@ -135,6 +111,11 @@ def find_potential_nests():
 
     # Create a DataFrame from the list of nests
     nests_df = pd.DataFrame(potential_nests_list)
+
+    # Resolve all nest countries at once against the local country polygons (offline)
+    print(f"\nAssigning countries to {len(nests_df)} nests from {SHAPEFILE_PATH}...")
+    countries = assign_countries(nests_df['nest_latitude'], nests_df['nest_longitude'], SHAPEFILE_PATH)
+    nests_df['country'] = pd.Series(countries, index=nests_df.index).fillna("Unknown")
     
     # Ensure the column order if desired (optional, pandas might pick a different order)
     if not nests_df.empty:
@@ -5,10 +5,13 @@ Description: Visualizes bee density and count maps from 2004 to 2050.
 """
 
 import os
+import sys
 import pandas as pd
-import geopandas as gpd
 import matplotlib.pyplot as plt
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.map_rendering import load_mainland_geometry, render_yearly_maps
+
 # === CONFIG ===
 forecast_path = "output/bee_forecast_2026_to_2050.csv"
 historical_path = "output/bee_density_trends.csv"
@@ -34,47 +37,30 @@ historical_df = historical_df[["Country", "Year", "Bee_Density", "Bee_Count"]]
 full_df = pd.concat([historical_df, forecast_df], ignore_index=True)
 
 # === LOAD SHAPEFILE ===
-world = gpd.read_file(shapefile_path)
-europe = world[world['NAME'].isin(full_df["Country"].unique())]
-europe = europe.explode(index_parts=True).reset_index(drop=True)
-europe['area'] = europe.geometry.area
-europe = europe.sort_values(by=['NAME', 'area'], ascending=[True, False])
-europe = europe.drop_duplicates(subset='NAME', keep='first')
+europe = load_mainland_geometry(shapefile_path, full_df["Country"].unique())
 
 # === COLOR RANGE ===
 vmax = full_df["Bee_Density"].max()
 vmin = 0
 
-# === PLOT EACH YEAR ===
-for year in sorted(full_df["Year"].unique()):
-    df_year = full_df[full_df["Year"] == year]
-    merged = europe.merge(df_year, left_on='NAME', right_on='Country', how='left')
-
-    fig, ax = plt.subplots(figsize=(11, 9))
-    merged.boundary.plot(ax=ax, color="grey", linewidth=0.5)
-    merged.plot(
-        ax=ax,
-        column='Bee_Density',
-        cmap='RdYlGn',  # Green = high, Red = low (default)
-        edgecolor='0.8',
-        legend=True,
-        alpha=0.8,  # pastel effect
-        vmin=vmin,
-        vmax=vmax,
-        missing_kwds={"color": "lightgrey", "label": "No data"}
-    )
-
-    for _, row in merged.iterrows():
-        if pd.notna(row['Bee_Count']) and row['Bee_Count'] > 0:
-            centroid = row['geometry'].centroid
-            ax.text(centroid.x, centroid.y, f"{int(row['Bee_Count'])}", fontsize=6,
-                    ha='center', va='center', color='black')
-
-    ax.set_title(f"Honeybee Density – {year}", fontsize=14)
-    ax.axis("off")
-    plt.tight_layout()
-    plt.savefig(f"{output_folder}/bee_density_{year}.png", dpi=200)
-    plt.close()
+# === PLOT EACH YEAR (in parallel) ===
+render_yearly_maps(
+    full_df, europe,
+    year_column="Year",
+    name_column="Country",
+    value_column="Bee_Density",
+    label_column="Bee_Count",
+    output_path=f"{output_folder}/bee_density_{{year}}.png",
+    title="Honeybee Density – {year}",
+    plot_kwargs={
+        "cmap": 'RdYlGn',  # Green = high, Red = low (default)
+        "edgecolor": '0.8',
+        "legend": True,
+        "alpha": 0.8,  # pastel effect
+        "vmin": vmin,
+        "vmax": vmax,
+    },
+)
 
 print(f"✅ Maps saved for 2004–2050 in: {output_folder}")
 
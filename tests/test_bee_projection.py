@@ -0,0 +1,103 @@
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.bee_projection import run_bee_scenarios
+
+
+# Per-row loop of the original bees/Forecast_last.py (bees/forecast.py differs only in
+# the column names and the multiplier)
+def baseline_forecast(hornets, bees, correlations, multiplier, year_column, country_column, density_column):
+    correlations = correlations.dropna(subset=["Density_vs_BeeGrowth_r"])
+    cor_map = correlations.set_index("Country")["Density_vs_BeeGrowth_r"].to_dict()
+    latest_bees = bees[bees["Year"] == 2024][["Country", "Bee_Density", "Bee_Count", "Area_km2"]].dropna()
+    state_map = latest_bees.set_index("Country").to_dict("index")
+
+    forecast_rows = []
+    for year in range(2025, 2051):
+        hornets_year = hornets[hornets[year_column] == year].set_index(country_column)
+        new_state_map = {}
+        for country, bee_data in state_map.items():
+            area = bee_data["Area_km2"]
+            density = bee_data["Bee_Density"]
+            hornet_density = hornets_year.at[country, density_column] if country in hornets_year.index else 0
+
+            prev_year = year - 1
+            if prev_year in hornets[year_column].values:
+                prev = hornets[(hornets[year_column] == prev_year) & (hornets[country_column] == country)]
+                prev_density_val = prev[density_column].values[0] if not prev.empty else 0
+                hornet_density_avg = (hornet_density + prev_density_val) / 2
+            else:
+                hornet_density_avg = hornet_density
+
+            corr = cor_map.get(country, -0.3)
+            base_decline = (hornet_density_avg * multiplier) ** 1.1 * abs(corr) * 2.0
+            decline = min(base_decline, 0.5 * density)
+            new_density = max(density - decline, 0)
+            new_count = new_density * area
+
+            new_state_map[country] = {"Bee_Density": new_density, "Bee_Count": round(new_count), "Area_km2": area}
+            forecast_rows.append({"Year": year, "Country": country, "Hornet_Density": hornet_density,
+                                  "Bee_Density": round(new_density, 6), "Bee_Count": round(new_count)})
+        state_map = new_state_map
+
+    df = pd.DataFrame(forecast_rows).sort_values(by=["Country", "Year"])
+    df["Bee_Density_Growth"] = df.groupby("Country")["Bee_Density"].pct_change().round(4).fillna(0)
+    return df
+
+
+def write_inputs(root):
+    """
+    Bee, correlation and hornet tables with a country missing its area, a country
+    without a correlation, hornet-free country-years, a year with no hornet rows at all
+    and densities high enough to hit the 50% cap.
+    """
+    rng = np.random.default_rng(2)
+    countries = ["France", "Spain", "Belgium", "Italy", "Portugal", "Austria"]
+    bees = pd.DataFrame({"Year": 2024, "Country": countries, "Bee_Density": rng.uniform(1, 8, 6),
+                         "Bee_Count": 0, "Area_km2": [551695.0, 505990.0, 30528.0, 301340.0, 92212.0, np.nan]})
+    bees = pd.concat([bees, bees.assign(Year=2023)])
+    correlations = pd.DataFrame({"Country": ["France", "Spain", "Belgium", "Portugal"],
+                                 "Density_vs_BeeGrowth_r": [-0.62, 0.35, -0.18, np.nan]})
+
+    rows = [(year, country, rng.uniform(0, 0.02) * (1 + 200 * (country == "Belgium")))
+            for year in range(2024, 2051) if year != 2030
+            for country in countries if rng.random() > 0.15]
+    hornets = pd.DataFrame(rows, columns=["year", "country", "adjusted_hive_density"])
+
+    bees.to_csv(root / "bees.csv", index=False)
+    correlations.to_csv(root / "correlations.csv", index=False)
+    hornets.to_csv(root / "hornets.csv", index=False)
+    hornets.rename(columns={"year": "Year", "country": "Country", "adjusted_hive_density": "hive_density"}).to_csv(
+        root / "hornets_pessimistic.csv", index=False)
+
+
+def to_csv(df):
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("name, path, columns, multiplier", [
+    ("pessimistic", "hornets_pessimistic.csv", ("Year", "Country", "hive_density"), 5),
+    ("realistic", "hornets.csv", ("year", "country", "adjusted_hive_density"), 3),
+])
+def test_projection_matches_per_row_loop(tmp_path, name, path, columns, multiplier):
+    write_inputs(tmp_path)
+    scenarios = [
+        {"name": "pessimistic", "hornet_path": str(tmp_path / "hornets_pessimistic.csv"), "multiplier": 5},
+        {"name": "realistic", "hornet_path": str(tmp_path / "hornets.csv"), "year_column": "year",
+         "country_column": "country", "density_column": "adjusted_hive_density", "multiplier": 3},
+    ]
+
+    df = run_bee_scenarios(scenarios, str(tmp_path / "bees.csv"), str(tmp_path / "correlations.csv"))
+    table = df[df["Scenario"] == name].drop(columns="Scenario")
+
+    expected = baseline_forecast(pd.read_csv(tmp_path / path), pd.read_csv(tmp_path / "bees.csv"),
+                                 pd.read_csv(tmp_path / "correlations.csv"), multiplier, *columns)
+    assert to_csv(table) == to_csv(expected)
@@ -0,0 +1,29 @@
+import os
+import sys
+
+import geopandas as gpd
+from shapely.geometry import MultiPolygon, box
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.country_lookup import border_neighbors
+
+
+def test_neighbors_share_a_border(tmp_path):
+    # B touches A and C along an edge; D is an island, and A's overseas part touches D
+    shapes = {
+        "A": MultiPolygon([box(0, 0, 1, 1), box(10, 10, 11, 11)]),
+        "B": box(1, 0, 2, 1),
+        "C": box(2, 0.5, 3, 1.5),
+        "D": box(11, 10, 12, 11),
+        "E": box(5, 5, 6, 6),
+    }
+    path = tmp_path / "countries.shp"
+    gpd.GeoDataFrame({"ADMIN": list(shapes)}, geometry=list(shapes.values()), crs="EPSG:4326").to_file(path)
+
+    assert border_neighbors(str(path)) == {
+        "A": ["B", "D"],
+        "B": ["A", "C"],
+        "C": ["B"],
+        "D": ["A"],
+        "E": [],
+    }
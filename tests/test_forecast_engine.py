@@ -0,0 +1,118 @@
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "forecast"))
+from country_neighbors import neighbors
+from forecast_engine import (advance_year, build_adjacency, build_initial_state, forecast_table, growth_stage_1,
+                             growth_stage_2, growth_stage_3, run_forecast, state_to_frame)
+
+
+# Per-country dict loop of the original forecast/forecast_spread_to_2050.py
+def baseline_forecast(initial_df, area_df, neighbors, forecast_years):
+    state_df = pd.merge(initial_df, area_df, on="country", how="left")
+    state_df["stage_year"] = 1
+    state_map = state_df.set_index("country").to_dict("index")
+    forecast_rows = []
+
+    for year in forecast_years:
+        new_state_map = {}
+        for country in neighbors:
+            prev = state_map.get(country)
+            if prev:
+                stage = prev["final_stage"]
+                stage_year = prev["stage_year"]
+                prev_density = prev["hive_density"]
+                if stage == 1:
+                    new_density = growth_stage_1(prev_density, stage_year)
+                elif stage == 2:
+                    new_density = growth_stage_2(prev_density, stage_year)
+                else:
+                    new_density = growth_stage_3(prev_density, stage_year)
+
+                if stage == 1 and new_density >= 0.0002:
+                    next_stage, stage_year = 2, 1
+                elif stage == 2 and new_density >= 0.005:
+                    next_stage, stage_year = 3, 1
+                else:
+                    next_stage, stage_year = stage, stage_year + 1
+                new_state_map[country] = {"final_stage": next_stage, "stage_year": stage_year,
+                                          "hive_density": new_density, "area_km2": prev["area_km2"]}
+            else:
+                for neighbor in neighbors.get(country, []):
+                    n_data = state_map.get(neighbor)
+                    if n_data and n_data["final_stage"] >= 2:
+                        area = area_df[area_df["country"] == country]["area_km2"]
+                        if area.empty:
+                            continue
+                        new_state_map[country] = {"final_stage": 1, "stage_year": 1,
+                                                  "hive_density": 2 / area.values[0], "area_km2": area.values[0]}
+                        break
+
+        for c, v in new_state_map.items():
+            dens = 0 if pd.isna(v["hive_density"]) else v["hive_density"]
+            area = 0 if pd.isna(v["area_km2"]) else v["area_km2"]
+            forecast_rows.append({"year": year, "country": c, "stage": v["final_stage"],
+                                  "stage_year": v["stage_year"], "hive_density": round(dens, 7),
+                                  "hive_count": round(dens * area)})
+        state_map = new_state_map.copy()
+
+    return pd.DataFrame(forecast_rows).sort_values(by=["year", "country"])
+
+
+def to_csv(df):
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    return buffer.getvalue()
+
+
+def test_forecast_matches_dict_loop():
+    initial_df = pd.DataFrame({
+        "country": ["France", "Spain", "Belgium", "Netherlands", "Italy", "Greece"],
+        "final_stage": [3, 2, 1, 1, 2, 1],
+        "hive_density": [0.0061, 0.0012, 0.00011, 0.000199, 0.0049, 0.00002],
+    })
+    # Ukraine has no area, so it is never seeded; Greece is invaded but has no neighbors spreading
+    area_map = {country: 20000.0 + 7919.0 * i for i, country in enumerate(neighbors) if country != "Ukraine"}
+    area_df = pd.DataFrame({"country": list(area_map), "area_km2": list(area_map.values())})
+    countries = list(neighbors)
+    years = list(range(2025, 2051))
+
+    state = build_initial_state(countries, initial_df, area_map)
+    adjacency = build_adjacency(countries, neighbors)
+    frames = [state_to_frame(year, s, countries) for year, s, _, _ in run_forecast(state, adjacency, years)]
+
+    assert to_csv(forecast_table(frames, integer_stage=True)) == to_csv(
+        baseline_forecast(initial_df, area_df, neighbors, years))
+
+
+def test_spread_matches_neighbor_scan_on_regional_graph():
+    rng = np.random.default_rng(3)
+    regions = [f"R{i}" for i in range(400)]
+    # Unordered, one-sided neighbor lists, some naming regions outside the simulation
+    region_neighbors = {r: list(rng.choice(regions + ["Outside"], size=rng.integers(0, 7), replace=False))
+                        for r in regions}
+    initial_df = pd.DataFrame({"country": regions, "final_stage": rng.integers(1, 4, len(regions)),
+                               "hive_density": rng.uniform(0.0001, 0.01, len(regions))}).sample(frac=0.3, random_state=3)
+    area_map = {r: rng.uniform(100, 5000) for r in regions if rng.random() > 0.1}
+    state_map = initial_df.set_index("country").to_dict("index")
+
+    state = build_initial_state(regions, initial_df, area_map)
+    _, invaded, sources = advance_year(state, build_adjacency(regions, region_neighbors))
+
+    # Neighbor scan of the original loop: first listed neighbor at stage 2+, if the region has an area
+    expected = {}
+    for region in regions:
+        if region in state_map or region not in area_map:
+            continue
+        for neighbor in region_neighbors[region]:
+            n_data = state_map.get(neighbor)
+            if n_data and n_data["final_stage"] >= 2:
+                expected[region] = neighbor
+                break
+
+    assert len(expected) > 50
+    assert {regions[i]: regions[s] for i, s in zip(invaded, sources)} == expected
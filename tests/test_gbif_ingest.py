@@ -0,0 +1,101 @@
+import os
+import sys
+import json
+import threading
+from datetime import date, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "gaia_api"))
+from gbif_ingest import drop_duplicate_occurrences, fetch_occurrences, quarter_windows
+
+BUSY_MONTH = (2015, 6)  # 40 records a day, 2 on every other day
+
+
+def day_records(day):
+    per_day = 40 if (day.year, day.month) == BUSY_MONTH else 2
+    records = [{"key": day.toordinal() * 1000 + i, "eventDate": f"{day.isoformat()}T10:00:00",
+                "decimalLatitude": 45.0, "decimalLongitude": 2.0, "species": "Vespa velutina"}
+               for i in range(per_day)]
+    if day.day == 1:
+        # Repeated occurrence key and two records without a key
+        records += [dict(records[0]), {"eventDate": day.isoformat()}, {"eventDate": day.isoformat()}]
+    return records
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """
+    GET /occurrence/search with eventDate=<start>,<end>, offset and limit, as the GBIF API.
+    """
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        start, end = [date.fromisoformat(d) for d in query["eventDate"][0].split(",")]
+        offset, limit = int(query["offset"][0]), int(query["limit"][0])
+        StandIn.requests.append((start, end, offset, limit))
+
+        records, day = [], start
+        while day <= end:
+            records += day_records(day)
+            day += timedelta(days=1)
+        body = json.dumps({"count": len(records), "results": records[offset:offset + limit],
+                           "endOfRecords": offset + limit >= len(records)}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    StandIn.requests = []
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def fetch(base_url, cache_dir):
+    windows = quarter_windows(date(2015, 1, 1), date(2015, 12, 31))
+    return fetch_occurrences("Vespa velutina", "POLYGON", windows, str(cache_dir), base_url=base_url,
+                             max_records=500, n_workers=2)
+
+
+def test_large_window_is_split_in_half(base_url, tmp_path):
+    df = fetch(base_url, tmp_path)
+
+    fetched = {(start, end) for start, end, offset, limit in StandIn.requests if limit > 0}
+    # Q2 holds the busy June (over 500 records) and is split at its middle day; Q1 is fetched whole
+    assert (date(2015, 4, 1), date(2015, 6, 30)) not in fetched
+    assert (date(2015, 4, 1), date(2015, 5, 16)) in fetched
+    assert (date(2015, 1, 1), date(2015, 3, 31)) in fetched
+    # Every keyed record once, plus the two keyless records of each month
+    assert len(df) == 2 * 365 + 38 * 30 + 12 * 2
+
+
+def test_second_run_resumes_from_cache(base_url, tmp_path):
+    first = fetch(base_url, tmp_path)
+    StandIn.requests = []
+
+    second = fetch(base_url, tmp_path)
+
+    assert StandIn.requests == []
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_duplicate_keys_dropped_and_keyless_records_kept(base_url, tmp_path):
+    df = fetch(base_url, tmp_path)
+
+    keyed = df["gbifID"].dropna()
+    assert keyed.is_unique
+    assert df["gbifID"].isna().sum() == 2 * 12
+
+    frame = pd.DataFrame({"gbifID": pd.array([1, None, 1, None, 2], dtype="Int64"), "row": range(5)})
+    assert drop_duplicate_occurrences(frame)["row"].tolist() == [0, 1, 3, 4]
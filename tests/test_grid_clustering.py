@@ -0,0 +1,51 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+from sklearn.cluster import DBSCAN
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import common.grid_clustering as grid_clustering
+from common.grid_clustering import grid_cluster
+
+
+def sightings(seed=11):
+    """
+    Hotspots of a few km across around Europe, scattered singles, repeated coordinates
+    and points near the antimeridian and the pole.
+    """
+    rng = np.random.default_rng(seed)
+    centers = np.column_stack((rng.uniform(36, 60, 40), rng.uniform(-10, 25, 40)))
+    spread = rng.uniform(0.005, 0.04, 40)
+    hotspots = np.concatenate([c + rng.normal(0, s, (rng.integers(5, 60), 2)) for c, s in zip(centers, spread)])
+    singles = np.column_stack((rng.uniform(36, 60, 300), rng.uniform(-10, 25, 300)))
+    edges = np.column_stack((np.concatenate([rng.uniform(-0.5, 0.5, 30), rng.uniform(89.97, 90, 20)]),
+                             np.concatenate([rng.choice([-179.99, 179.99], 30), rng.uniform(-180, 180, 20)])))
+    points = np.concatenate([hotspots, singles, edges, hotspots[:25]])
+    return points[rng.permutation(len(points))]
+
+
+def dbscan_labels(points, eps_km, earth_radius_km):
+    db = DBSCAN(eps=eps_km / earth_radius_km, min_samples=1, algorithm='ball_tree', metric='haversine')
+    return db.fit(np.radians(points)).labels_
+
+
+@pytest.mark.parametrize("eps_km", [0.5, 2, 15])
+def test_labels_match_dbscan(eps_km):
+    points = sightings()
+    expected = dbscan_labels(points, eps_km, 6371.0088)
+
+    labels = grid_cluster(points[:, 0], points[:, 1], eps_km, earth_radius_km=6371.0088)
+
+    assert 20 < expected.max() < len(points) - 20
+    np.testing.assert_array_equal(labels, expected)
+
+
+def test_labels_match_dbscan_in_small_pair_batches(monkeypatch):
+    monkeypatch.setattr(grid_clustering, "PAIR_BATCH_SIZE", 7)
+    points = sightings(seed=5)
+
+    labels = grid_cluster(points[:, 0], points[:, 1], 2, earth_radius_km=6371.0)
+
+    np.testing.assert_array_equal(labels, dbscan_labels(points, 2, 6371.0))
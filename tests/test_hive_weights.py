@@ -0,0 +1,78 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.hive_weights import resolve_weights
+
+NEIGHBORS = {
+    'Germany': ['France', 'Belgium', 'Netherlands', 'Luxembourg'],
+    'Italy': ['France', 'Switzerland'],
+    'Switzerland': ['France', 'Germany', 'Italy'],
+    'Luxembourg': ['France', 'Belgium', 'Germany'],
+    'Austria': ['Germany', 'Italy', 'Switzerland'],
+}
+
+
+# Per-row assign_weight of the original historic_data/CoutriesTableCreation.py
+def baseline_weights(merged, weights_df, neighbors):
+    country_avg = weights_df.groupby('country')['final_weight'].mean().to_dict()
+    year_avg = weights_df.groupby('year')['final_weight'].mean().to_dict()
+    global_avg = weights_df['final_weight'].mean()
+    global_min = weights_df['final_weight'].min()
+    global_max = weights_df['final_weight'].max()
+
+    def clamp(value, min_val, max_val):
+        return max(min_val, min(value, max_val))
+
+    def assign_weight(row):
+        if pd.notna(row['final_weight']):
+            return clamp(row['final_weight'], global_min, global_max)
+        country = row['country']
+        year = row['year']
+        if country in country_avg:
+            return clamp(country_avg[country], global_min, global_max)
+        nearby_weights = []
+        if country in neighbors:
+            for neighbor in neighbors[country]:
+                near_rows = weights_df[(weights_df['country'] == neighbor) &
+                                       (weights_df['year'].between(year - 1, year + 1))]
+                nearby_weights.extend(near_rows['final_weight'].dropna().tolist())
+            if nearby_weights:
+                return clamp(sum(nearby_weights) / len(nearby_weights), 0.1, 10.0)
+        if year in year_avg:
+            return clamp(year_avg[year], 0.1, 10.0)
+        return clamp(global_avg, 0.1, 10.0)
+
+    return merged.apply(assign_weight, axis=1).to_numpy(dtype=float)
+
+
+def weight_tables():
+    """
+    Weights with out-of-range and missing values, and estimated counts that reach every
+    fallback level: exact, country average, neighbors ±1 year, year average and global.
+    """
+    rng = np.random.default_rng(4)
+    weights = [(year, country, rng.uniform(0.02, 14)) for year in range(2010, 2020)
+               for country in ['France', 'Belgium', 'Netherlands', 'Spain'] if rng.random() > 0.3]
+    weights += [(2012, 'Belgium', np.nan), (2016, 'Switzerland', 3.2), (2021, 'Spain', 20.0)]
+    weights_df = pd.DataFrame(weights, columns=['year', 'country', 'final_weight']).drop_duplicates(
+        subset=['year', 'country'])
+
+    counts = pd.DataFrame([(year, country, rng.integers(1, 50)) for year in range(2008, 2024)
+                           for country in ['France', 'Belgium', 'Spain', 'Switzerland', 'Germany', 'Italy',
+                                           'Luxembourg', 'Austria', 'Portugal']],
+                          columns=['year', 'country', 'estimated_hives_without_weighting'])
+    merged = pd.merge(counts, weights_df, on=['year', 'country'], how='left')
+    return merged, weights_df
+
+
+def test_weights_match_per_row_apply():
+    merged, weights_df = weight_tables()
+
+    weights, sources = resolve_weights(merged, weights_df, NEIGHBORS)
+
+    np.testing.assert_array_equal(weights, baseline_weights(merged, weights_df, NEIGHBORS))
+    assert set(sources) == {'exact', 'country_avg', 'neighbor_avg', 'year_avg', 'global_avg'}
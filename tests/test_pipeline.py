@@ -0,0 +1,36 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.pipeline import Pipeline
+
+# Stage "b" rewrites the table "a" writes, like adaptNumbers.py after CoutriesTableCreation.py
+STAGES = [
+    {"name": "a", "script": "a.py", "cwd": ".", "outputs": ["table.txt"]},
+    {"name": "b", "script": "b.py", "cwd": ".", "inputs": ["table.txt"], "outputs": ["table.txt"]},
+]
+
+
+def write_scripts(root, comment=""):
+    (root / "a.py").write_text(f"{comment}\nopen('table.txt', 'w').write('base\\n')\n")
+    (root / "b.py").write_text("open('table.txt', 'a').write('adapted\\n')\n")
+
+
+def test_unchanged_stages_are_current(tmp_path):
+    write_scripts(tmp_path)
+    pipeline = Pipeline(STAGES, root=tmp_path)
+
+    assert pipeline.run(n_workers=1) == {"a": "ran", "b": "ran"}
+    assert pipeline.run(n_workers=1) == {"a": "current", "b": "current"}
+    assert (tmp_path / "table.txt").read_text() == "base\nadapted\n"
+
+
+def test_rewriting_stage_reruns_after_its_producer(tmp_path):
+    write_scripts(tmp_path)
+    pipeline = Pipeline(STAGES, root=tmp_path)
+    pipeline.run(n_workers=1)
+
+    # Comment-only edit: "a" runs again and writes the same bytes as before
+    write_scripts(tmp_path, comment="# reworded")
+    assert pipeline.run(n_workers=1) == {"a": "ran", "b": "ran"}
+    assert (tmp_path / "table.txt").read_text() == "base\nadapted\n"
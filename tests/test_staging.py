@@ -0,0 +1,80 @@
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.staging import stage_table
+
+
+# Per-row staging of the original forecast/AssignInvasionStage.py
+def classify_stage(density):
+    if pd.isna(density):
+        return None
+    elif density < 0.0002:
+        return 1
+    elif density < 0.005:
+        return 2
+    else:
+        return 3
+
+
+def enforce_stage_progression(df):
+    df = df.sort_values(by=["country", "year"]).copy()
+    df["final_stage"] = None
+    max_stage_so_far = {}
+    for idx, row in df.iterrows():
+        country = row["country"]
+        current_stage = row["invasion_stage"]
+        if pd.isna(current_stage):
+            df.at[idx, "final_stage"] = None
+            continue
+        locked_stage = max(max_stage_so_far.get(country, 1), current_stage)
+        df.at[idx, "final_stage"] = locked_stage
+        max_stage_so_far[country] = locked_stage
+    return df
+
+
+def baseline_stage_table(df):
+    df = df.copy()
+    df["invasion_stage"] = df["hive_density"].apply(classify_stage)
+    df = enforce_stage_progression(df)
+    df["stage_label"] = df["final_stage"].map({1: "Newly Invaded", 2: "Expanding", 3: "Saturated"})
+    return df
+
+
+def density_table(with_missing=False):
+    rng = np.random.default_rng(7)
+    rows = [(country, year, rng.choice([0.0001, 0.0002, 0.001, 0.005, 0.02]))
+            for country in ["France", "Spain", "Belgium"] for year in range(2015, 2022)]
+    df = pd.DataFrame(rows, columns=["country", "year", "hive_density"]).sample(frac=1, random_state=1)
+    if with_missing:
+        df.loc[df.index[:3], "hive_density"] = np.nan
+    return df.reset_index(drop=True)
+
+
+def to_csv(df):
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    return buffer.getvalue()
+
+
+def test_staged_csv_matches_baseline():
+    df = density_table()
+
+    assert to_csv(stage_table(df)) == to_csv(baseline_stage_table(df))
+    assert pd.read_csv(io.StringIO(to_csv(stage_table(df))))["final_stage"].dtype == np.int64
+
+
+def test_missing_density_has_no_stage():
+    df = density_table(with_missing=True)
+
+    new, old = stage_table(df), baseline_stage_table(df)
+
+    assert str(new["final_stage"].dtype) == "Int64"
+    assert new.index.equals(old.index)
+    for column in ["invasion_stage", "final_stage"]:
+        assert new[column].astype("Float64").equals(pd.Series(old[column], dtype="Float64"))
+    assert new["stage_label"].equals(old["stage_label"])
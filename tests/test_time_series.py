@@ -0,0 +1,31 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.time_series import fill_year_gaps
+
+
+def test_gap_filled_with_flat_average():
+    df = pd.DataFrame({"country": ["A", "A"], "year": [2010, 2014], "count": [10.0, 20.0]})
+
+    filled = fill_year_gaps(df, "count")
+
+    assert filled["year"].tolist() == [2011, 2012, 2013]
+    assert filled["count"].tolist() == [15.0, 15.0, 15.0]
+
+
+def test_rows_without_group_are_ignored():
+    df = pd.DataFrame({
+        "country": ["A", np.nan, np.nan, "A"],
+        "year": [2010, 2011, 2013, 2014],
+        "count": [10.0, 100.0, 200.0, 20.0],
+    })
+
+    filled = fill_year_gaps(df, "count")
+
+    assert filled["country"].tolist() == ["A", "A", "A"]
+    assert filled["year"].tolist() == [2011, 2012, 2013]
+    assert filled["count"].tolist() == [15.0, 15.0, 15.0]